@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/browse of the file manager on a generated directory tree.
+
+Creates an output-style folder with tens of thousands of PNG files plus some
+subfolders, then reports the latency of:
+  - cold:     the first /api/browse request (builds the directory size index)
+  - warm:     later /api/browse requests for the whole folder (served from the listing cache)
+  - page:     one 500-item page (?limit=500), as the file manager UI requests it
+  - listing:  get_folder_contents() alone, without the listing cache
+  - legacy:   the original os.listdir/os.stat/os.access listing with os.walk folder sizes
+
+Usage: python benchmark_browse.py [--files 50000] [--folders 50] [--runs 5]
+"""
+import argparse
+import atexit
+import mimetypes
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import file_manager
+
+
+def legacy_directory_size(directory):
+    """The original get_directory_size: os.walk capped at 1000 files"""
+    total_size = file_count = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            total_size += os.path.getsize(os.path.join(dirpath, filename))
+            file_count += 1
+            if file_count > 1000:
+                return total_size, file_count, True
+    return total_size, file_count, False
+
+
+def legacy_folder_contents(folder_path):
+    """The original per-item listing of get_folder_contents (sorted by name)"""
+    items = []
+    for item in os.listdir(folder_path):
+        item_path = os.path.join(folder_path, item)
+        stat_info = os.stat(item_path)
+        entry = {'name': item, 'modified_timestamp': stat_info.st_mtime,
+                 'is_readable': os.access(item_path, os.R_OK),
+                 'is_writable': os.access(item_path, os.W_OK)}
+        if os.path.isdir(item_path):
+            contents = os.listdir(item_path)
+            entry['type'] = 'folder'
+            entry['file_count'] = len([f for f in contents if os.path.isfile(os.path.join(item_path, f))])
+            entry['dir_count'] = len([f for f in contents if os.path.isdir(os.path.join(item_path, f))])
+            entry['size'] = legacy_directory_size(item_path)[0]
+        else:
+            entry['type'] = 'file'
+            entry['size'] = stat_info.st_size
+            entry['mime_type'] = mimetypes.guess_type(item_path)[0]
+            entry['category'] = file_manager.get_file_category(entry['mime_type'], item_path)
+        items.append(entry)
+    items.sort(key=lambda x: x['name'].lower())
+    return items
+
+
+def generate_tree(root, files, folders):
+    """files PNGs at the top level plus folders subfolders of 200 files each"""
+    png = b'\x89PNG\r\n\x1a\n' + os.urandom(1024)
+    for i in range(files):
+        with open(os.path.join(root, f'ComfyUI_{i:05d}_.png'), 'wb') as f:
+            f.write(png)
+    for i in range(folders):
+        folder = os.path.join(root, f'batch_{i:03d}')
+        os.makedirs(folder)
+        for j in range(200):
+            with open(os.path.join(folder, f'frame_{j:04d}.png'), 'wb') as f:
+                f.write(png)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=50000, help='PNG files in the browsed folder')
+    parser.add_argument('--folders', type=int, default=50, help='subfolders (200 files each)')
+    parser.add_argument('--runs', type=int, default=5, help='runs per method (median is reported)')
+    args = parser.parse_args()
+
+    # /tmp is one of the file manager's allowed directories
+    work_dir = tempfile.mkdtemp(prefix='browse_bench_', dir='/tmp')
+    root = os.path.join(work_dir, 'output')
+    os.makedirs(root)
+    # Keep the benchmark's index out of /workspace and don't persist it
+    file_manager.dir_size_index.index_file = os.path.join(work_dir, 'dir_size_index.json')
+    atexit.unregister(file_manager.dir_size_index.save)
+    client = file_manager.app.test_client()
+
+    def browse(**params):
+        response = client.get('/api/browse', query_string={'path': root, **params})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/browse returned {response.status_code}: {response.get_data(as_text=True)}")
+        return response
+
+    try:
+        print(f"Generating {args.files} files and {args.folders} folders...")
+        generate_tree(root, args.files, args.folders)
+        total = args.files + args.folders
+
+        cold, response = timed(browse)
+        warm = [timed(browse)[0] for _ in range(args.runs)]
+        page = [timed(lambda: browse(limit=500))[0] for _ in range(args.runs)]
+        def listing_uncached():
+            file_manager.listing_cache.clear()
+            return file_manager.get_folder_contents(root)
+
+        listing = [timed(listing_uncached)[0] for _ in range(args.runs)]
+        legacy = [timed(lambda: legacy_folder_contents(root))[0] for _ in range(args.runs)]
+
+        print(f"{total} entries, response {len(response.get_data()) / 1024 / 1024:.1f} MB")
+        print(f"{'cold':<8} {cold * 1000:>10.1f} ms")
+        print(f"{'warm':<8} {statistics.median(warm) * 1000:>10.1f} ms")
+        print(f"{'page':<8} {statistics.median(page) * 1000:>10.1f} ms")
+        print(f"{'listing':<8} {statistics.median(listing) * 1000:>10.1f} ms")
+        print(f"{'legacy':<8} {statistics.median(legacy) * 1000:>10.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
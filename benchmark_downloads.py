@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark the model downloader write path against the original 8KB iter_content loop.
+
+Serves a generated file from a local HTTP server (with Range support) in a
+separate process and reports wall time, throughput and client CPU time for:
+  - legacy:    requests iter_content(8192) with per-chunk speed/ETA math
+  - single:    download_file() over one connection (large readinto buffer)
+  - segmented: download_file() with parallel range requests
+
+Usage: python benchmark_downloads.py [--size-mb 1024] [--runs 3]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import shutil
+import socket
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves files from the current directory with single-range support"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_body(head_only=True)
+
+    def do_GET(self):
+        self.send_body()
+
+    def send_body(self, head_only=False):
+        path = os.path.join(os.getcwd(), os.path.basename(self.path))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head_only:
+            return
+
+        with open(path, 'rb') as f:
+            os.sendfile(self.wfile.fileno(), f.fileno(), start, end - start + 1)
+
+
+def serve(directory, port):
+    os.chdir(directory)
+    ThreadingHTTPServer(('127.0.0.1', port), RangeRequestHandler).serve_forever()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def legacy_download(url, destination):
+    """The original download_file loop, without status persistence"""
+    status = {destination: {'progress': 0, 'timestamp': 0}}
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+    total_size = int(response.headers.get('content-length', 0))
+    downloaded = 0
+    start_time = time.time()
+
+    with open(destination, 'wb') as f:
+        for data in response.iter_content(8192):
+            downloaded += len(data)
+            f.write(data)
+
+            current_time = time.time()
+            elapsed_time = current_time - start_time
+            progress = int((downloaded / total_size) * 100) if total_size > 0 else 0
+            speed = downloaded / elapsed_time if elapsed_time > 0 else 0
+            eta = (total_size - downloaded) / speed if speed > 0 and total_size > 0 else 0
+
+            if progress > status.get(destination, {}).get('progress', 0) or \
+               current_time - status.get(destination, {}).get('timestamp', 0) > 5:
+                status[destination] = {'progress': progress, 'timestamp': current_time,
+                                       'downloaded': downloaded, 'speed': speed, 'eta': eta}
+    return downloaded
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(name, func, url, destination, size, runs):
+    results = []
+    for _ in range(runs):
+        if os.path.exists(destination):
+            os.remove(destination)
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        func(url, destination)
+        wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+        if os.path.getsize(destination) != size:
+            raise RuntimeError(f"{name}: wrong output size {os.path.getsize(destination)}")
+        results.append((wall, cpu))
+
+    wall, cpu = min(results)
+    print(f"{name:<10} {size / wall / 1024 / 1024:>10.1f} MB/s {wall:>8.2f} s {cpu:>8.2f} s CPU")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=1024, help='size of the generated test file')
+    parser.add_argument('--runs', type=int, default=3, help='runs per method (best is reported)')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='download_bench_')
+    serve_dir = os.path.join(work_dir, 'serve')
+    os.makedirs(serve_dir)
+    size = args.size_mb * 1024 * 1024
+    with open(os.path.join(serve_dir, 'model.bin'), 'wb') as f:
+        for _ in range(args.size_mb):
+            f.write(os.urandom(1024 * 1024))
+
+    # Keep the benchmark away from the real /workspace status file
+    import model_downloader
+    model_downloader.DOWNLOAD_STATUS_FILE = os.path.join(work_dir, 'download_status.json')
+
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(serve_dir, port), daemon=True)
+    server.start()
+    time.sleep(0.5)
+    url = f'http://127.0.0.1:{port}/model.bin'
+    destination = os.path.join(work_dir, 'out', 'model.bin')
+    os.makedirs(os.path.dirname(destination))
+
+    def single(url, destination):
+        model_downloader.DOWNLOAD_SEGMENTS = 1
+        assert model_downloader.download_file(url, destination)
+
+    def segmented(url, destination):
+        model_downloader.DOWNLOAD_SEGMENTS = 8
+        assert model_downloader.download_file(url, destination)
+
+    try:
+        print(f"{args.size_mb} MB file, best of {args.runs} runs, "
+              f"{model_downloader.DOWNLOAD_BUFFER_SIZE // (1024 * 1024)} MB buffer")
+        measure('legacy', legacy_download, url, destination, size, args.runs)
+        measure('single', single, url, destination, size, args.runs)
+        measure('segmented', segmented, url, destination, size, args.runs)
+    finally:
+        server.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark folder export of the file manager on a generated output folder.
+
+Creates a mixed folder (already-compressed PNG/MP4 files, uncompressed PPM
+frames and JSON workflows), then reports wall time, throughput and archive
+size for:
+  - legacy:    the original download_folder (zipfile ZIP_DEFLATED into a temp file)
+  - stream:    /api/download_folder (streaming zipfile, one thread)
+  - export:    /api/export?format=zip at each --levels, with EXPORT_WORKERS threads
+  - tar.zst:   /api/export?format=tar.zst (only when zstandard is installed)
+
+Usage: python benchmark_export.py [--size-mb 512] [--levels 1,6] [--runs 3]
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import file_manager
+
+
+def legacy_export(folder_path, output):
+    """The original download_folder: build the whole zip before sending it"""
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for root, dirs, files in os.walk(folder_path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                zipf.write(file_path, os.path.relpath(file_path, folder_path))
+    return os.path.getsize(output)
+
+
+def generate_tree(root, size_mb):
+    """About size_mb of outputs: 40% PNG/MP4 (random bytes), 55% PPM frames, the rest JSON"""
+    mb = 1024 * 1024
+    for i in range(max(1, size_mb * 2 // 10)):
+        with open(os.path.join(root, f'ComfyUI_{i:05d}_.png'), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + os.urandom(2 * mb))
+    videos = os.path.join(root, 'videos')
+    os.makedirs(videos)
+    for i in range(max(1, size_mb // 40)):
+        with open(os.path.join(videos, f'clip_{i:03d}.mp4'), 'wb') as f:
+            f.write(os.urandom(16 * mb))
+    frames = os.path.join(root, 'frames')
+    os.makedirs(frames)
+    # Smooth gradients with a little noise compress roughly like real renders
+    row = bytes((x // 4) % 256 for x in range(1024 * 3))
+    for i in range(max(1, size_mb * 55 // 300)):
+        with open(os.path.join(frames, f'frame_{i:05d}.ppm'), 'wb') as f:
+            f.write(b'P6\n1024 1024\n255\n')
+            for y in range(1024):
+                f.write(row[y % 7:] + row[:y % 7] if y % 64 else os.urandom(len(row)))
+    workflows = os.path.join(root, 'workflows')
+    os.makedirs(workflows)
+    nodes = {str(i): {'class_type': 'KSampler', 'inputs': {'seed': i, 'steps': 30, 'cfg': 7.0}}
+             for i in range(2000)}
+    for i in range(max(1, size_mb // 20)):
+        with open(os.path.join(workflows, f'workflow_{i:04d}.json'), 'w') as f:
+            json.dump(nodes, f, indent=2)
+
+
+def tree_size(root):
+    return sum(os.path.getsize(os.path.join(dirpath, name))
+               for dirpath, _, names in os.walk(root) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=512, help='approximate size of the generated folder')
+    parser.add_argument('--levels', default='1,6', help='comma-separated zip levels for /api/export')
+    parser.add_argument('--workers', default='', help='comma-separated EXPORT_WORKERS values (default: current)')
+    parser.add_argument('--runs', type=int, default=3, help='runs per method (best is reported)')
+    args = parser.parse_args()
+
+    # /tmp is one of the file manager's allowed directories
+    work_dir = tempfile.mkdtemp(prefix='export_bench_', dir='/tmp')
+    root = os.path.join(work_dir, 'output')
+    os.makedirs(root)
+    file_manager.dir_size_index.index_file = os.path.join(work_dir, 'dir_size_index.json')
+    atexit.unregister(file_manager.dir_size_index.save)
+    client = file_manager.app.test_client()
+
+    def fetch(url, **params):
+        def run():
+            response = client.get(url, query_string={'path': root, **params})
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)}")
+            return sum(len(chunk) for chunk in response.response)
+        return run
+
+    def measure(name, func):
+        results = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            size = func()
+            results.append((time.perf_counter() - start, size))
+        wall, size = min(results)
+        print(f"{name:<16} {source / wall / 1024 / 1024:>8.1f} MB/s {wall:>8.2f} s "
+              f"{size / 1024 / 1024:>9.1f} MB ({size / source:.0%})")
+
+    try:
+        print(f"Generating about {args.size_mb} MB of outputs...")
+        generate_tree(root, args.size_mb)
+        source = tree_size(root)
+        print(f"{source / 1024 / 1024:.1f} MB source, best of {args.runs} runs, {file_manager.USABLE_CPUS} usable CPUs")
+
+        measure('legacy', lambda: legacy_export(root, os.path.join(work_dir, 'legacy.zip')))
+        measure('stream', fetch('/api/download_folder'))
+        workers = [int(w) for w in args.workers.split(',') if w] or [file_manager.EXPORT_WORKERS]
+        for count in workers:
+            file_manager.EXPORT_WORKERS = count
+            for level in args.levels.split(','):
+                measure(f'export L{level} x{count}', fetch('/api/export', format='zip', level=level))
+            if file_manager.zstandard is not None:
+                measure(f'tar.zst L3 x{count}', fetch('/api/export', format='tar.zst', level=3))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
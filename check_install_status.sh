@@ -88,13 +88,13 @@ else
     echo "✗ ComfyUI is not running"
 fi
 
-if pgrep -f "python.*model_downloader.py" > /dev/null; then
+if pgrep -f "python.*model_downloader" > /dev/null; then
     echo "✓ Model Downloader is running"
 else
     echo "✗ Model Downloader is not running"
 fi
 
-if pgrep -f "python.*file_manager.py" > /dev/null; then
+if pgrep -f "python.*file_manager" > /dev/null; then
     echo "✓ File Manager is running"
 else
     echo "✗ File Manager is not running"
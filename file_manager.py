@@ -1,15 +1,37 @@
-from flask import Flask, render_template, request, send_file, jsonify, send_from_directory, abort
+from flask import Flask, render_template, request, jsonify, Response, g
 import os
 import zipfile
-import tempfile
+import io
+import zlib
+import queue
+import tarfile
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
 import mimetypes
 from datetime import datetime
 import shutil
 import json
 import stat
-from urllib.parse import unquote
+from urllib.parse import unquote, quote
 import subprocess
+import threading
+import time
+import atexit
+import ctypes
+import ctypes.util
+import select
+import struct
+import functools
+import base64
+import sqlite3
+import hashlib
+import contextlib
+import fcntl
+import errno
+import re
+import fnmatch
+import secrets
+from collections import OrderedDict, deque
 
 app = Flask(__name__)
 
@@ -25,6 +47,94 @@ ALLOWED_DIRECTORIES = [
     "/tmp"
 ]
 
+# Touched while uploads/downloads are in flight so model_downloader.py can
+# slow its "background" downloads down (see INTERACTIVE_TRANSFER_TIMEOUT there)
+INTERACTIVE_TRANSFER_MARKER = "/workspace/.interactive_transfer"
+INTERACTIVE_TRANSFER_HEARTBEAT = 2  # Seconds between touches during a long transfer
+TRANSFER_ENDPOINTS = {'download_file', 'preview_file', 'download_multiple', 'download_folder',
+                      'export_files', 'upload_file', 'upload_chunk'}
+
+active_transfers = 0
+transfer_lock = threading.Lock()
+
+def touch_transfer_marker():
+    try:
+        with open(INTERACTIVE_TRANSFER_MARKER, 'a'):
+            os.utime(INTERACTIVE_TRANSFER_MARKER)
+    except OSError:
+        pass
+
+def transfer_heartbeat():
+    """Keep the marker fresh until the last active transfer finishes"""
+    while True:
+        time.sleep(INTERACTIVE_TRANSFER_HEARTBEAT)
+        with transfer_lock:
+            if active_transfers == 0:
+                return
+        touch_transfer_marker()
+
+def begin_transfer():
+    global active_transfers
+    with transfer_lock:
+        active_transfers += 1
+        start_heartbeat = active_transfers == 1
+    touch_transfer_marker()
+    if start_heartbeat:
+        threading.Thread(target=transfer_heartbeat, daemon=True).start()
+
+def end_transfer():
+    global active_transfers
+    with transfer_lock:
+        active_transfers = max(0, active_transfers - 1)
+
+def transfer_ender():
+    """end_transfer() that takes effect once, however many close hooks call it"""
+    ended = threading.Event()
+
+    def end_once():
+        if not ended.is_set():
+            ended.set()
+            end_transfer()
+    return end_once
+
+@app.before_request
+def track_transfer_start():
+    if request.endpoint in TRANSFER_ENDPOINTS:
+        begin_transfer()
+        g.end_transfer = transfer_ender()
+
+@app.after_request
+def track_transfer_end(response):
+    end = g.pop('end_transfer', None)
+    if end is None:
+        return response
+    if not response.direct_passthrough:
+        # Fires once the body has been sent, not when the view returns
+        response.call_on_close(end)
+        return response
+
+    # send_file bodies are handed to the server as-is (keeping wsgi.file_wrapper/sendfile),
+    # which skips call_on_close, so hook the body's own close() instead
+    body = response.response
+    close = getattr(body, 'close', None)
+
+    def close_body():
+        try:
+            if close is not None:
+                close()
+        finally:
+            end()
+
+    body.close = close_body
+    return response
+
+@app.teardown_request
+def track_transfer_abort(error=None):
+    # A view that raised never reached track_transfer_end, so nothing else ends its transfer
+    end = g.pop('end_transfer', None)
+    if end is not None:
+        end()
+
 def is_safe_path(path):
     """Check if path is within allowed directories"""
     abs_path = os.path.abspath(path)
@@ -67,122 +177,829 @@ def format_file_size(size_bytes):
         i += 1
     return f"{size_bytes:.1f} {size_names[i]}"
 
-def get_file_info(file_path):
-    """Get comprehensive file information"""
+@functools.lru_cache(maxsize=1024)
+def get_extension_type(ext):
+    """(MIME type, icon category) for a lowercase file extension"""
+    mime_type = mimetypes.guess_type('file' + ext)[0] or 'application/octet-stream'
+    return mime_type, get_file_category(mime_type, 'file' + ext)
+
+def has_access(stat_info, mode):
+    """os.access() equivalent from an existing stat result (R_OK or W_OK), without a syscall"""
+    if EFFECTIVE_UID == 0:
+        return True
+    if stat_info.st_uid == EFFECTIVE_UID:
+        bit = stat.S_IRUSR if mode == os.R_OK else stat.S_IWUSR
+    elif stat_info.st_gid in EFFECTIVE_GROUPS:
+        bit = stat.S_IRGRP if mode == os.R_OK else stat.S_IWGRP
+    else:
+        bit = stat.S_IROTH if mode == os.R_OK else stat.S_IWOTH
+    return bool(stat_info.st_mode & bit)
+
+EFFECTIVE_UID = os.geteuid()
+EFFECTIVE_GROUPS = set(os.getgroups()) | {os.getegid()}
+
+def format_timestamp(timestamp):
+    """Local time as 'YYYY-MM-DD HH:MM:SS' (isoformat is about twice as fast as strftime)"""
+    return datetime.fromtimestamp(timestamp).isoformat(' ', 'seconds')
+
+def get_file_info(file_path, stat_info=None):
+    """Get comprehensive file information (stat_info saves the stat call when already known)"""
     try:
-        stat_info = os.stat(file_path)
+        if stat_info is None:
+            stat_info = os.stat(file_path)
         file_size = stat_info.st_size
+        extension = os.path.splitext(file_path)[1].lower()
         
-        # Get MIME type
-        mime_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
-        
-        # File category for icons
-        category = get_file_category(mime_type, file_path)
+        # MIME type and icon category only depend on the extension
+        mime_type, category = get_extension_type(extension)
         
         return {
             'size': file_size,
             'size_formatted': format_file_size(file_size),
-            'modified': datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            'modified': format_timestamp(stat_info.st_mtime),
             'modified_timestamp': stat_info.st_mtime,
             'type': 'file',
             'mime_type': mime_type,
             'category': category,
             'permissions': oct(stat_info.st_mode)[-3:],
-            'is_readable': os.access(file_path, os.R_OK),
-            'is_writable': os.access(file_path, os.W_OK),
-            'extension': os.path.splitext(file_path)[1].lower()
+            'is_readable': has_access(stat_info, os.R_OK),
+            'is_writable': has_access(stat_info, os.W_OK),
+            'extension': extension
         }
     except Exception as e:
         return None
 
+# Persistent index of recursive directory sizes (see DirectorySizeIndex)
+DIR_SIZE_INDEX_FILE = "/workspace/.dir_size_index.json"
+DIR_SIZE_REVALIDATE_INTERVAL = 10  # Seconds between mtime re-checks of a subtree without inotify
+DIR_SIZE_SAVE_INTERVAL = 30  # Seconds between index writes while it is changing
+INOTIFY_DEBOUNCE = 1.0  # Collect events this long before rescanning the changed directories
+# Bookkeeping files written inside /workspace by these services and the install scripts
+# (prefixes, so temp files, SQLite -wal/-shm files and directory contents match too).
+# The watcher ignores them; otherwise saving an index would trigger a rescan that saves it again.
+WATCH_IGNORED_PATHS = (DIR_SIZE_INDEX_FILE, "/workspace/.file_search.db", INTERACTIVE_TRANSFER_MARKER,
+                       "/workspace/.download_status.json", "/workspace/.hash_cache.json",
+                       "/workspace/.uploads/", "/workspace/.install_markers/", "/workspace/installation_")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+class InotifyWatcher:
+    """Minimal ctypes inotify binding that reports which watched directories changed.
+
+    on_change(paths) is called from the watcher thread with a set of directories
+    whose entries were created, deleted, renamed or written; on_overflow() when
+    events were lost. Events for entries whose path starts with one of ignored
+    are dropped. complete is False once a watch could not be added (usually
+    fs.inotify.max_user_watches), so callers know to fall back to polling.
+    """
+
+    MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+            IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    def __init__(self, on_change, on_overflow, ignored=()):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.on_change = on_change
+        self.on_overflow = on_overflow
+        self.ignored = tuple(ignored)
+        self.paths = {}  # watch descriptor -> directory
+        self.watches = {}  # directory -> watch descriptor
+        self.complete = True
+        self.lock = threading.Lock()
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def add(self, path):
+        with self.lock:
+            if path in self.watches:
+                return
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            if wd < 0:
+                if ctypes.get_errno() == 28:  # ENOSPC: out of watches
+                    self.complete = False
+                return
+            self.paths[wd] = path
+            self.watches[path] = wd
+
+    def remove(self, path):
+        with self.lock:
+            wd = self.watches.pop(path, None)
+            if wd is not None:
+                self.paths.pop(wd, None)
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def _run(self):
+        pending = set()
+        deadline = None
+        while True:
+            timeout = max(0, deadline - time.monotonic()) if deadline else None
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if ready:
+                pending.update(self._read_events())
+                if pending and deadline is None:
+                    deadline = time.monotonic() + INOTIFY_DEBOUNCE
+            elif pending:
+                changed, pending, deadline = pending, set(), None
+                try:
+                    self.on_change(changed)
+                except Exception as e:
+                    print(f"Error applying file system changes: {e}")
+
+    def _read_events(self):
+        """Directories mentioned by the queued events"""
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+            offset += INOTIFY_EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                self.on_overflow()
+                continue
+            with self.lock:
+                path = self.paths.get(wd)
+                if mask & IN_IGNORED:
+                    # Watch removed by the kernel (directory deleted or unmounted)
+                    self.paths.pop(wd, None)
+                    if self.watches.get(path) == wd:
+                        del self.watches[path]
+                    continue
+            if path is None:
+                continue
+            if name and os.path.join(path, os.fsdecode(name)).startswith(self.ignored):
+                continue
+            changed.add(path)
+        return changed
+
+def scan_directory(path):
+    """Own file bytes/count and subdirectory names of one directory"""
+    # mtime is read first so a change made during the scan is noticed later
+    node = {'mtime_ns': os.stat(path).st_mtime_ns, 'size': 0, 'files': 0, 'dirs': []}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():  # Like os.walk, don't descend into linked dirs
+                        node['dirs'].append(entry.name)
+                    continue
+                node['size'] += entry.stat().st_size
+                node['files'] += 1
+            except OSError:
+                pass  # Vanished or broken symlink
+    return node
+
+def scan_tree(path):
+    """Scan every directory below path; returns {directory: node} with recursive totals"""
+    nodes = {}
+    order = []
+    stack = [path]
+    while stack:
+        directory = stack.pop()
+        try:
+            node = scan_directory(directory)
+        except OSError:
+            continue
+        nodes[directory] = node
+        order.append(directory)
+        stack.extend(os.path.join(directory, name) for name in node['dirs'])
+
+    # Children always come after their parent in order, so sum bottom-up
+    for directory in reversed(order):
+        node = nodes[directory]
+        children = [os.path.join(directory, name) for name in node['dirs']]
+        children = [child for child in children if child in nodes]
+        node['dirs'] = [os.path.basename(child) for child in children]
+        node['total_size'] = node['size'] + sum(nodes[child]['total_size'] for child in children)
+        node['total_files'] = node['files'] + sum(nodes[child]['total_files'] for child in children)
+    return nodes
+
+class DirectorySizeIndex:
+    """Exact recursive directory sizes, built once per tree and then kept current.
+
+    Each node stores a directory's own file bytes/count, its subdirectory names
+    and recursive totals. A change inside one directory rescans only that
+    directory and adds the size delta to its ancestors, so lookups are a dict
+    access. Changes arrive through inotify; without it (or once the watch limit
+    is hit) a subtree's directory mtimes are re-checked at most every
+    DIR_SIZE_REVALIDATE_INTERVAL seconds. Entries loaded from disk are re-checked
+    once the same way before they are trusted. Directory mtimes don't change when
+    a file is rewritten in place, which only inotify (or the full rescan at
+    startup) picks up. A tree that isn't indexed yet is scanned on the scanner
+    thread, never on a request thread; lookups return None until it is done.
+    """
+
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.nodes = {}
+        self.validated = {}  # subtree root -> time its mtimes were last checked
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.last_save = time.time()
+        self.listeners = []  # Called with each batch of changed directories
+        self.pending = set()  # Trees waiting for the scanner thread
+        self.wakeup = threading.Event()
+        self.load()
+        self.watcher = None
+        try:
+            self.watcher = InotifyWatcher(self.apply_changes, self.invalidate, WATCH_IGNORED_PATHS)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, directory sizes use mtime checks: {e}")
+        threading.Thread(target=self._scan_pending, daemon=True).start()
+
+    def size(self, path):
+        """(total bytes, total files) below path, or None while it is being scanned"""
+        node = self.lookup(path)
+        return (node['total_size'], node['total_files']) if node else None
+
+    def lookup(self, path):
+        """Copy of path's node: own 'files' count, 'dirs' names and recursive totals.
+
+        None if path isn't indexed yet; its scan is then queued for the scanner thread.
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        with self.lock:
+            known = path in self.nodes
+            fresh = known and self.is_validated(path)
+        if not known:
+            self.request_scan(path)
+            return None
+        if not fresh:
+            self.revalidate(path)
+
+        self.save_if_due()
+        with self.lock:
+            node = self.nodes.get(path)
+            return dict(node, dirs=list(node['dirs'])) if node else None
+
+    def is_validated(self, path):
+        """Whether path's subtree is watched or was mtime-checked recently (caller holds lock)"""
+        watching = self.watcher is not None and self.watcher.complete
+        while True:
+            checked = self.validated.get(path)
+            if checked is not None and (watching or time.time() - checked < DIR_SIZE_REVALIDATE_INTERVAL):
+                return True
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+
+    def request_scan(self, path):
+        with self.lock:
+            self.pending.add(path)
+        self.wakeup.set()
+
+    def _scan_pending(self):
+        """Scanner thread: index the trees lookups asked for, shallowest first"""
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                paths, self.pending = self.pending, set()
+            for path in sorted(paths, key=len):
+                with self.lock:
+                    if path in self.nodes:
+                        continue  # Already indexed as part of an earlier tree
+                try:
+                    self.add_tree(path)
+                except Exception as e:
+                    print(f"Error scanning {path} for directory sizes: {e}")
+            self.save_if_due()
+
+    def add_tree(self, path):
+        """(Re)build the index for path with a full scan"""
+        nodes = scan_tree(path)
+        with self.lock:
+            self._drop_subtree(path)
+            self.nodes.update(nodes)
+            self.dirty = True
+        # Catch directories that changed while the scan was running
+        self.revalidate(path)
+
+    def revalidate(self, path):
+        """Rescan the directories below path whose mtime changed"""
+        now = time.time()
+        with self.lock:
+            subtree = self._subtree(path)
+        # Watch before comparing so nothing changes unseen in between
+        self._watch(subtree)
+        changed = []
+        for directory in subtree:
+            try:
+                if os.stat(directory).st_mtime_ns != self.nodes[directory]['mtime_ns']:
+                    changed.append(directory)
+            except (OSError, KeyError):
+                pass  # Removed; its parent's rescan drops it
+        self.apply_changes(changed)
+        with self.lock:
+            self.validated[path] = now
+
+    def apply_changes(self, directories):
+        """Rescan changed directories, parents before children"""
+        for directory in sorted(directories, key=len):
+            self.update_directory(directory)
+        self.save_if_due()
+        for listener in self.listeners:
+            listener(directories)
+
+    def update_directory(self, path):
+        """Rescan one directory's own entries and propagate the size change to its ancestors"""
+        try:
+            fresh = scan_directory(path)
+        except OSError:
+            return  # Removed; its parent's rescan drops it
+        with self.lock:
+            node = self.nodes.get(path)
+            if node is None:
+                return
+            added = set(fresh['dirs']) - set(node['dirs'])
+        new_nodes = {}
+        for name in added:
+            new_nodes.update(scan_tree(os.path.join(path, name)))
+
+        with self.lock:
+            node = self.nodes.get(path)
+            if node is None:
+                return
+            old_size, old_files = node['total_size'], node['total_files']
+            for name in set(node['dirs']) - set(fresh['dirs']):
+                self._drop_subtree(os.path.join(path, name))
+            self.nodes.update(new_nodes)
+
+            children = [os.path.join(path, name) for name in fresh['dirs']]
+            children = [child for child in children if child in self.nodes]
+            node.update(fresh)
+            node['dirs'] = [os.path.basename(child) for child in children]
+            node['total_size'] = node['size'] + sum(self.nodes[c]['total_size'] for c in children)
+            node['total_files'] = node['files'] + sum(self.nodes[c]['total_files'] for c in children)
+
+            size_delta = node['total_size'] - old_size
+            files_delta = node['total_files'] - old_files
+            parent = os.path.dirname(path)
+            while parent != path and parent in self.nodes:
+                self.nodes[parent]['total_size'] += size_delta
+                self.nodes[parent]['total_files'] += files_delta
+                path, parent = parent, os.path.dirname(parent)
+            self.dirty = True
+        self._watch(new_nodes)
+
+    def invalidate(self):
+        """Events were lost: re-check every tree by mtime on its next lookup"""
+        with self.lock:
+            self.validated.clear()
+
+    def _subtree(self, path):
+        """Indexed directories at and below path (caller holds lock)"""
+        found = []
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            node = self.nodes.get(directory)
+            if node is None:
+                continue
+            found.append(directory)
+            stack.extend(os.path.join(directory, name) for name in node['dirs'])
+        return found
+
+    def _drop_subtree(self, path):
+        """Forget path and everything below it (caller holds lock)"""
+        for directory in self._subtree(path):
+            del self.nodes[directory]
+            self.validated.pop(directory, None)
+            if self.watcher is not None:
+                self.watcher.remove(directory)
+
+    def _watch(self, directories):
+        if self.watcher is not None:
+            for directory in directories:
+                self.watcher.add(directory)
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                self.nodes = json.load(f).get('nodes', {})
+        except (OSError, ValueError):
+            self.nodes = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps({'nodes': self.nodes})
+            self.dirty = False
+            self.last_save = time.time()
+        try:
+            temp_file = self.index_file + '.tmp'
+            with open(temp_file, 'w') as f:
+                f.write(data)
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            print(f"Error saving directory size index: {e}")
+
+    def save_if_due(self):
+        if self.dirty and time.time() - self.last_save > DIR_SIZE_SAVE_INTERVAL:
+            self.save()
+
+dir_size_index = DirectorySizeIndex(DIR_SIZE_INDEX_FILE)
+atexit.register(dir_size_index.save)
+
+def warm_dir_size_index():
+    """Rescan the whole workspace in the background after startup.
+
+    Until it finishes, lookups are served from the saved index after an mtime check.
+    """
+    if os.path.isdir(WORKSPACE_DIR):
+        dir_size_index.add_tree(WORKSPACE_DIR)
+        dir_size_index.save()
+
+threading.Thread(target=warm_dir_size_index, daemon=True).start()
+
+# Persistent filename index used by /api/search (see FileSearchIndex)
+SEARCH_INDEX_FILE = "/workspace/.file_search.db"
+SEARCH_INDEX_ROOTS = [WORKSPACE_DIR]
+SEARCH_RESCAN_INTERVAL = 300  # Seconds between mtime scans that catch changes inotify missed
+SEARCH_DEFAULT_LIMIT = 100
+SEARCH_MAX_LIMIT = 1000
+
+def path_range(path):
+    """Bounds such that lower < p < upper for every p strictly below path"""
+    return path + '/', path + '0'  # '0' sorts right after '/'
+
+def like_pattern(text, prefix=False):
+    """LIKE pattern (used with ESCAPE '\\') matching text literally as a substring or prefix"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%' if prefix else '%' + escaped + '%'
+
+def name_conditions(query, mode):
+    """SQL conditions on the names table and their arguments for a lowercase query"""
+    if mode == 'glob':
+        return ["names.name GLOB ?"], [query]
+    conditions, arguments = [], []
+    if len(query) >= 3:
+        # With the trigram tokenizer a phrase query is an indexed substring match
+        conditions.append("names MATCH ?")
+        arguments.append('"' + query.replace('"', '""') + '"')
+    if mode == 'prefix' or len(query) < 3:
+        conditions.append("names.name LIKE ? ESCAPE '\\'")
+        arguments.append(like_pattern(query, prefix=(mode == 'prefix')))
+    return conditions, arguments
+
+class FileSearchIndex:
+    """Filename index in SQLite with an FTS5 trigram table for substring/prefix/glob search.
+
+    A single indexer thread owns all writes. It syncs each root once by
+    comparing directory mtimes against the stored ones (so only new or changed
+    directories are listed), then applies the changed directories reported by
+    the directory size index's inotify watcher, and repeats the mtime scan
+    every SEARCH_RESCAN_INTERVAL seconds to catch anything it missed. Names
+    only change through directory entries, so the mtime scan is exact.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, "
+        "parent TEXT NOT NULL, name TEXT NOT NULL, is_dir INTEGER NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS files_parent ON files (parent)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, tokenize='trigram')",
+        "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    ]
+
+    def __init__(self, db_file, roots):
+        self.db_file = db_file
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.local = threading.local()
+        self.pending = set()
+        self.pending_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.ready = set()
+        try:
+            db = self.connect()
+            for statement in self.SCHEMA:
+                db.execute(statement)
+            db.commit()
+            self.ready = {row[0][len('ready:'):] for row in
+                          db.execute("SELECT key FROM meta WHERE key LIKE 'ready:%'")}
+        except sqlite3.Error as e:
+            print(f"File search index unavailable: {e}")
+            self.roots = []
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def connect(self):
+        """This thread's connection (SQLite connections can't be shared between threads)"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def covers(self, path):
+        """Whether path lies in a root whose first full sync has finished"""
+        return any(path == root or path.startswith(root + '/') for root in self.ready)
+
+    def directories_changed(self, directories):
+        """Queue directories whose entries changed (called by the inotify watcher)"""
+        with self.pending_lock:
+            self.pending.update(directories)
+        self.wakeup.set()
+
+    def search(self, path, query, mode='substring', limit=SEARCH_DEFAULT_LIMIT, offset=0):
+        """(total matches, [(path, name, is_dir)]) for names below path, best matches first"""
+        query = query.lower()
+        conditions, arguments = name_conditions(query, mode)
+        lower, upper = path_range(os.path.normpath(path))
+        where = " AND ".join(conditions + ["files.path > ?", "files.path < ?"])
+        arguments += [lower, upper]
+
+        db = self.connect()
+        # CROSS JOIN keeps the trigram lookup as the outer loop; otherwise SQLite may
+        # scan the path range and re-run the full-text query for every row
+        joined = "FROM names CROSS JOIN files ON files.id = names.rowid"
+        total = db.execute(f"SELECT count(*) {joined} WHERE {where}", arguments).fetchone()[0]
+        # Exact name, then name prefix, then shorter names and shallower paths
+        rows = db.execute(
+            f"SELECT files.path, files.name, files.is_dir {joined} WHERE {where} "
+            "ORDER BY CASE WHEN names.name = ? THEN 0 WHEN names.name LIKE ? ESCAPE '\\' THEN 1 ELSE 2 END, "
+            "length(files.name), length(files.path), files.path LIMIT ? OFFSET ?",
+            arguments + [query, like_pattern(query, prefix=True), limit, offset]).fetchall()
+        return total, rows
+
+    def _run(self):
+        for root in self.roots:
+            try:
+                self.sync_tree(root)
+                self.ready.add(root)
+                db = self.connect()
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", ('ready:' + root, str(time.time())))
+                db.commit()
+            except Exception as e:
+                self.connect().rollback()
+                print(f"Error indexing {root} for search: {e}")
+
+        while True:
+            rescan = not self.wakeup.wait(SEARCH_RESCAN_INTERVAL)
+            self.wakeup.clear()
+            with self.pending_lock:
+                directories, self.pending = self.pending, set()
+            try:
+                for directory in sorted(directories, key=len):
+                    if any(directory == root or directory.startswith(root + '/') for root in self.roots):
+                        self.sync_directory(directory)
+                if rescan:
+                    for root in self.roots:
+                        self.sync_tree(root)
+                self.connect().commit()
+            except Exception as e:
+                self.connect().rollback()  # Drop the half-applied sync; the next rescan redoes it
+                print(f"Error updating search index: {e}")
+
+    def sync_tree(self, root):
+        """Re-list every directory below root whose mtime differs from the stored one"""
+        db = self.connect()
+        stack = [root]
+        synced = 0
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            row = db.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (directory,)).fetchone()
+            if row is None or row[0] != mtime_ns:
+                self.sync_directory(directory)
+                synced += 1
+                if synced % 1000 == 0:
+                    db.commit()  # Let searches see progress of a long first build
+            stack.extend(path for (path,) in
+                         db.execute("SELECT path FROM files WHERE parent = ? AND is_dir = 1", (directory,)))
+        db.commit()
+
+    def sync_directory(self, directory):
+        """Make the stored entries of one directory match the file system"""
+        db = self.connect()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            entries = {}
+            with os.scandir(directory) as listing:
+                for entry in listing:
+                    try:
+                        entries[entry.name] = entry.is_dir() and not entry.is_symlink()
+                    except OSError:
+                        pass
+        except OSError:
+            return  # Gone; the parent's sync removes it
+
+        stored = {name: (bool(is_dir), path) for name, is_dir, path in
+                  db.execute("SELECT name, is_dir, path FROM files WHERE parent = ?", (directory,))}
+        for name, (is_dir, path) in stored.items():
+            if entries.get(name) != is_dir:
+                self.remove_path(path)
+        new_dirs = []
+        for name, is_dir in entries.items():
+            if stored.get(name, (None,))[0] != is_dir:
+                path = os.path.join(directory, name)
+                cursor = db.execute("INSERT INTO files (path, parent, name, is_dir) VALUES (?, ?, ?, ?)",
+                                    (path, directory, name, int(is_dir)))
+                db.execute("INSERT INTO names (rowid, name) VALUES (?, ?)", (cursor.lastrowid, name.lower()))
+                if is_dir:
+                    new_dirs.append(path)
+        db.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (directory, mtime_ns))
+        # New (or renamed) directories arrive with their contents
+        for path in new_dirs:
+            self.sync_tree(path)
+
+    def remove_path(self, path):
+        """Forget a file, or a directory and everything below it"""
+        db = self.connect()
+        lower, upper = path_range(path)
+        matching = "path = ? OR (path > ? AND path < ?)"
+        db.execute(f"DELETE FROM names WHERE rowid IN (SELECT id FROM files WHERE {matching})", (path, lower, upper))
+        db.execute(f"DELETE FROM files WHERE {matching}", (path, lower, upper))
+        db.execute(f"DELETE FROM dirs WHERE {matching}", (path, lower, upper))
+
+file_search_index = FileSearchIndex(SEARCH_INDEX_FILE, SEARCH_INDEX_ROOTS)
+dir_size_index.listeners.append(file_search_index.directories_changed)
+
 def get_directory_size(directory):
-    """Calculate total size of directory (with limit for performance)"""
-    total_size = 0
-    file_count = 0
+    """Total size and file count of a directory from the size index.
+
+    The third value is True while the directory is still being scanned (the size is unknown).
+    """
     try:
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                    file_count += 1
-                    # Limit for performance - stop counting after 1000 files
-                    if file_count > 1000:
-                        return total_size, file_count, True
-                except:
-                    pass
-    except:
-        pass
-    return total_size, file_count, False
+        size = dir_size_index.size(directory)
+    except OSError:
+        return 0, 0, False
+    if size is None:
+        return 0, 0, True
+    return size[0], size[1], False
 
-def get_folder_contents(folder_path, sort_by='name', sort_order='asc'):
-    """Get contents of a folder with comprehensive information"""
+def get_folder_info(folder_path, name, stat_info):
+    """Listing entry for a subfolder; counts and sizes come from the directory size index"""
     try:
-        items = []
-        if not os.path.exists(folder_path):
-            return items
-        
-        for item in os.listdir(folder_path):
-            item_path = os.path.join(folder_path, item)
-            
+        node = dir_size_index.lookup(folder_path)
+    except OSError:
+        node = None
+    total_size = node['total_size'] if node else 0
+    return {
+        'name': name,
+        'type': 'folder',
+        'file_count': node['files'] if node else 0,
+        'dir_count': len(node['dirs']) if node else 0,
+        'size': total_size,
+        'size_formatted': format_file_size(total_size),
+        'size_pending': node is None,  # Not indexed yet: the counts and size are placeholders
+        'modified': format_timestamp(stat_info.st_mtime),
+        'modified_timestamp': stat_info.st_mtime,
+        'permissions': oct(stat_info.st_mode)[-3:],
+        'is_readable': has_access(stat_info, os.R_OK),
+        'is_writable': has_access(stat_info, os.W_OK)
+    }
+
+# Sorted directory listings, reused until the directory's mtime changes
+LISTING_CACHE_SIZE = 16  # Directories kept
+LISTING_CACHE_VIEWS = 8  # Sort/filter combinations kept per directory
+# Upper bound on reuse: files still being written don't change the directory mtime
+LISTING_CACHE_TTL = 30
+BROWSE_MAX_LIMIT = 5000
+
+listing_cache = OrderedDict()  # path -> {'mtime_ns', 'time', 'items', 'views'}
+listing_cache_lock = threading.Lock()
+
+def read_folder_contents(folder_path):
+    """Unsorted listing entries for every item in a folder"""
+    items = []
+    # One pass over DirEntry objects: the type comes from the directory listing
+    # itself and each entry is stat'ed at most once
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
             try:
-                stat_info = os.stat(item_path)
+                stat_info = entry.stat()
                 
-                if os.path.isdir(item_path):
-                    # Count files and subdirectories
-                    try:
-                        contents = os.listdir(item_path)
-                        file_count = len([f for f in contents if os.path.isfile(os.path.join(item_path, f))])
-                        dir_count = len([f for f in contents if os.path.isdir(os.path.join(item_path, f))])
-                        total_size, _, is_truncated = get_directory_size(item_path)
-                    except:
-                        file_count = dir_count = 0
-                        total_size = 0
-                        is_truncated = False
-                    
-                    items.append({
-                        'name': item,
-                        'type': 'folder',
-                        'file_count': file_count,
-                        'dir_count': dir_count,
-                        'size': total_size,
-                        'size_formatted': format_file_size(total_size) + (' (est.)' if is_truncated else ''),
-                        'modified': datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                        'modified_timestamp': stat_info.st_mtime,
-                        'permissions': oct(stat_info.st_mode)[-3:],
-                        'is_readable': os.access(item_path, os.R_OK),
-                        'is_writable': os.access(item_path, os.W_OK)
-                    })
+                if entry.is_dir():
+                    items.append(get_folder_info(entry.path, entry.name, stat_info))
                 else:
                     # File
-                    file_info = get_file_info(item_path)
+                    file_info = get_file_info(entry.path, stat_info)
                     if file_info:
-                        file_info['name'] = item
+                        file_info['name'] = entry.name
                         items.append(file_info)
             except Exception as e:
                 continue
-        
-        # Sort items
-        if sort_by == 'name':
-            items.sort(key=lambda x: x['name'].lower(), reverse=(sort_order == 'desc'))
-        elif sort_by == 'size':
-            items.sort(key=lambda x: x.get('size', 0), reverse=(sort_order == 'desc'))
-        elif sort_by == 'modified':
-            items.sort(key=lambda x: x.get('modified_timestamp', 0), reverse=(sort_order == 'desc'))
-        elif sort_by == 'type':
-            items.sort(key=lambda x: (x['type'], x['name'].lower()), reverse=(sort_order == 'desc'))
-        
-        # Separate folders and files, folders first unless sorted by other criteria
-        if sort_by == 'name' or sort_by == 'type':
-            folders = [item for item in items if item['type'] == 'folder']
-            files = [item for item in items if item['type'] == 'file']
-            return folders + files
-        else:
-            return items
-        
+    return items
+
+def sort_folder_contents(items, sort_by='name', sort_order='asc'):
+    """Sorted copy of listing entries"""
+    items = list(items)
+    if sort_by == 'name':
+        items.sort(key=lambda x: x['name'].lower(), reverse=(sort_order == 'desc'))
+    elif sort_by == 'size':
+        items.sort(key=lambda x: x.get('size', 0), reverse=(sort_order == 'desc'))
+    elif sort_by == 'modified':
+        items.sort(key=lambda x: x.get('modified_timestamp', 0), reverse=(sort_order == 'desc'))
+    elif sort_by == 'type':
+        items.sort(key=lambda x: (x['type'], x['name'].lower()), reverse=(sort_order == 'desc'))
+    
+    # Separate folders and files, folders first unless sorted by other criteria
+    if sort_by == 'name' or sort_by == 'type':
+        folders = [item for item in items if item['type'] == 'folder']
+        files = [item for item in items if item['type'] == 'file']
+        return folders + files
+    else:
+        return items
+
+def matches_filters(item, categories, extensions):
+    """Folders have the category 'folder' and no extension"""
+    if categories and item.get('category', 'folder') not in categories:
+        return False
+    if extensions and item.get('extension', '') not in extensions:
+        return False
+    return True
+
+def get_folder_listing(folder_path, sort_by='name', sort_order='asc', categories=(), extensions=()):
+    """Sorted, filtered listing of a folder from the listing cache.
+
+    Returns a view dict with 'items', 'total_files' and 'total_folders'. Views
+    are shared between requests and must not be modified.
+    """
+    # Read the mtime first so changes made while listing invalidate the result
+    mtime_ns = os.stat(folder_path).st_mtime_ns
+    view_key = (sort_by, sort_order, tuple(sorted(categories)), tuple(sorted(extensions)))
+    with listing_cache_lock:
+        entry = listing_cache.get(folder_path)
+        if entry is not None and (entry['mtime_ns'] != mtime_ns or
+                                  time.time() - entry['time'] > LISTING_CACHE_TTL):
+            entry = None
+        if entry is not None:
+            listing_cache.move_to_end(folder_path)
+            view = entry['views'].get(view_key)
+            if view is not None:
+                entry['views'].move_to_end(view_key)
+                return view
+
+    if entry is None:
+        entry = {'mtime_ns': mtime_ns, 'time': time.time(),
+                 'items': read_folder_contents(folder_path), 'views': OrderedDict()}
+
+    items = sort_folder_contents(entry['items'], sort_by, sort_order)
+    if categories or extensions:
+        items = [item for item in items if matches_filters(item, categories, extensions)]
+    folders = sum(1 for item in items if item['type'] == 'folder')
+    view = {'items': items, 'total_folders': folders, 'total_files': len(items) - folders, 'positions': None}
+
+    if any(item.get('size_pending') for item in entry['items']):
+        return view  # Sizes arrive once the scan finishes; don't cache the placeholders
+    with listing_cache_lock:
+        entry['views'][view_key] = view
+        while len(entry['views']) > LISTING_CACHE_VIEWS:
+            entry['views'].popitem(last=False)
+        listing_cache[folder_path] = entry
+        listing_cache.move_to_end(folder_path)
+        while len(listing_cache) > LISTING_CACHE_SIZE:
+            listing_cache.popitem(last=False)
+    return view
+
+def get_folder_contents(folder_path, sort_by='name', sort_order='asc'):
+    """Get contents of a folder with comprehensive information"""
+    try:
+        if not os.path.exists(folder_path):
+            return []
+        return list(get_folder_listing(folder_path, sort_by, sort_order)['items'])
     except Exception as e:
         return []
 
+def encode_cursor(offset, name):
+    """Opaque /api/browse cursor: the position and name of the next item"""
+    token = json.dumps([offset, name]).encode('utf-8')
+    return base64.urlsafe_b64encode(token).decode('ascii')
+
+def resolve_cursor(view, cursor):
+    """Index of the item a cursor points at, following the item if entries moved"""
+    offset, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    items = view['items']
+    if 0 <= offset < len(items) and items[offset]['name'] == name:
+        return offset
+    # The listing changed since the cursor was issued: continue at the same item
+    if view['positions'] is None:
+        view['positions'] = {item['name']: index for index, item in enumerate(items)}
+    return view['positions'].get(name, min(max(0, int(offset)), len(items)))
+
 def get_breadcrumbs(path):
     """Generate breadcrumb navigation"""
     parts = [p for p in path.split('/') if p]
@@ -216,10 +1033,17 @@ def index():
 
 @app.route('/api/browse')
 def browse():
-    """API endpoint to browse directory contents"""
+    """API endpoint to browse directory contents.
+
+    Optional paging: limit (items per page) and cursor (next_cursor of the previous
+    page). Optional filters: category and ext, comma-separated (e.g. category=image,video
+    or ext=.png,.jpg); folders have the category 'folder'.
+    """
     path = request.args.get('path', '/workspace/ComfyUI/output')
     sort_by = request.args.get('sort', 'name')
     sort_order = request.args.get('order', 'asc')
+    categories = {c.strip().lower() for c in request.args.get('category', '').split(',') if c.strip()}
+    extensions = {'.' + e.strip().lower().lstrip('.') for e in request.args.get('ext', '').split(',') if e.strip()}
     
     # Security check
     if not is_safe_path(path):
@@ -229,7 +1053,20 @@ def browse():
         return jsonify({'error': 'Directory does not exist'}), 404
     
     try:
-        contents = get_folder_contents(path, sort_by, sort_order)
+        view = get_folder_listing(path, sort_by, sort_order, categories, extensions)
+        items = view['items']
+        
+        try:
+            limit = min(int(request.args['limit']), BROWSE_MAX_LIMIT) if request.args.get('limit') else None
+            start = resolve_cursor(view, request.args['cursor']) if request.args.get('cursor') else 0
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
+        if limit is not None and limit < 1:
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
+        
+        end = len(items) if limit is None else min(start + limit, len(items))
+        contents = items[start:end]
+        next_cursor = encode_cursor(end, items[end]['name']) if end < len(items) else None
         
         # Get parent directory
         parent_path = os.path.dirname(path) if path != '/workspace' else None
@@ -244,26 +1081,487 @@ def browse():
             'parent_path': parent_path,
             'contents': contents,
             'breadcrumbs': breadcrumbs,
-            'total_items': len(contents),
-            'total_files': len([item for item in contents if item['type'] == 'file']),
-            'total_folders': len([item for item in contents if item['type'] == 'folder'])
+            'total_items': len(items),
+            'total_files': view['total_files'],
+            'total_folders': view['total_folders'],
+            'offset': start,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Single-file responses with byte ranges and revalidation
+FILE_SERVE_BLOCK_SIZE = 1024 * 1024  # Read size when the server can't sendfile
+
+class FileRange:
+    """Read-only view of length bytes of an open file starting at start.
+
+    The file descriptor is positioned at start, so a wsgi.file_wrapper that uses
+    sendfile (gunicorn) sends exactly the range (bounded by Content-Length)
+    without copying it through Python; other servers call read().
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return iter(lambda: self.read(FILE_SERVE_BLOCK_SIZE), b'')
+
+    def close(self):
+        self.file.close()
+
+def file_etag(stat_info):
+    """Strong validator that changes whenever the file is replaced or rewritten"""
+    return f"{stat_info.st_ino:x}-{stat_info.st_size:x}-{stat_info.st_mtime_ns:x}"
+
+def is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and int(last_modified) <= since.timestamp()
+
+def range_applies(etag, last_modified):
+    """A Range is honoured unless If-Range names a different version of the file"""
+    if_range = request.if_range
+    if if_range.etag:
+        return if_range.etag == etag
+    if if_range.date:
+        return int(last_modified) == int(if_range.date.timestamp())
+    return True
+
+def serve_file(file_path, disposition):
+    """Send a file inline or as an attachment with Range, ETag and Last-Modified support"""
+    try:
+        f = open(file_path, 'rb')
+    except FileNotFoundError:
+        return jsonify({'error': 'File not found'}), 404
+    except PermissionError:
+        return jsonify({'error': 'Permission denied'}), 403
+    try:
+        stat_info = os.fstat(f.fileno())
+        size = stat_info.st_size
+        etag = file_etag(stat_info)
+        last_modified = stat_info.st_mtime
+
+        response = Response(mimetype=mimetypes.guess_type(file_path)[0] or 'application/octet-stream')
+        response.set_etag(etag)
+        response.last_modified = int(last_modified)
+        response.headers['Accept-Ranges'] = 'bytes'
+        # Outputs can be overwritten in place, so revalidate (a cheap 304) on every use
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['Content-Disposition'] = content_disposition(disposition, os.path.basename(file_path))
+
+        if is_not_modified(etag, last_modified):
+            f.close()
+            response.status_code = 304
+            return response
+
+        start, length = 0, size
+        if request.range and range_applies(etag, last_modified):
+            byte_range = request.range.range_for_length(size)
+            if byte_range is None and len(request.range.ranges) == 1:
+                f.close()
+                response.status_code = 416
+                response.headers['Content-Range'] = f'bytes */{size}'
+                return response
+            if byte_range is not None:
+                # Multi-range requests fall through to the whole file, which HTTP allows
+                start, stop = byte_range
+                length = stop - start
+                response.status_code = 206
+                response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+        body = FileRange(f, start, length)
+        file_wrapper = request.environ.get('wsgi.file_wrapper')
+        response.response = file_wrapper(body, FILE_SERVE_BLOCK_SIZE) if file_wrapper else body
+        response.direct_passthrough = True
+        response.content_length = length
+        return response
+    except Exception:
+        f.close()
+        raise
+
 @app.route('/api/download')
 def download_file():
-    """Download a single file"""
+    """Download a single file (supports Range requests, so interrupted downloads resume)"""
     file_path = request.args.get('path', '')
-    
+
     # Security check
     if not is_safe_path(file_path):
         return jsonify({'error': 'Access denied'}), 403
-    
-    if not os.path.exists(file_path) or not os.path.isfile(file_path):
+
+    if not os.path.isfile(file_path):
         return jsonify({'error': 'File not found'}), 404
-    
-    return send_file(file_path, as_attachment=True)
+
+    return serve_file(file_path, 'attachment')
+
+@app.route('/api/preview')
+def preview_file():
+    """Serve a file inline for <img>/<video> previews: seekable and cacheable by the browser"""
+    file_path = request.args.get('path', '')
+
+    # Security check
+    if not is_safe_path(file_path):
+        return jsonify({'error': 'Access denied'}), 403
+
+    if not os.path.isfile(file_path):
+        return jsonify({'error': 'File not found'}), 404
+
+    return serve_file(file_path, 'inline')
+
+# Thumbnails for image and video outputs
+THUMB_CACHE_DIR = "/workspace/.thumbnails"
+THUMB_CACHE_MAX_BYTES = int(os.environ.get('THUMB_CACHE_MB', 512)) * 1024 * 1024
+THUMB_SIZES = (128, 256, 512)  # Longest edge; requests are rounded up to one of these
+THUMB_WORKERS = int(os.environ.get('THUMB_WORKERS', min(4, os.cpu_count() or 1)))
+THUMB_TIMEOUT = 30  # Seconds a request waits for its thumbnail (generation continues after)
+THUMB_QUALITY = 80
+THUMB_SAMPLE_SIZE = 64 * 1024  # Bytes hashed from the start, middle and end of a file
+THUMB_TOUCH_INTERVAL = 3600  # Seconds between mtime bumps that persist LRU order across restarts
+THUMB_MAX_AGE = 365 * 24 * 3600
+THUMB_FAILURES_KEPT = 1024
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None  # Images are thumbnailed with ffmpeg instead (slower)
+
+@functools.lru_cache(maxsize=None)
+def find_ffmpeg():
+    """ffmpeg from PATH, or the binary bundled with imageio-ffmpeg (installed for ComfyUI's video nodes)"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        return ffmpeg
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=8192)
+def content_fingerprint(file_path, inode, size, mtime_ns):
+    """Hash of a file's size and sampled content.
+
+    Copies and renamed outputs share a fingerprint (and so a cached thumbnail)
+    without reading whole videos; inode/mtime only key this memo.
+    """
+    sha256 = hashlib.sha256(str(size).encode())
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        for offset in sorted({0, max(0, size // 2 - THUMB_SAMPLE_SIZE // 2), max(0, size - THUMB_SAMPLE_SIZE)}):
+            sha256.update(os.pread(fd, THUMB_SAMPLE_SIZE, offset))
+    finally:
+        os.close(fd)
+    return sha256.hexdigest()[:40]
+
+class ThumbnailCache:
+    """JPEG thumbnails on disk, evicted least recently used first past max_bytes"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = None  # key -> [size, last touched], least recently used first
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.jpg")
+
+    def _load(self):
+        """Rebuild the LRU order from file mtimes (call with self.lock held)"""
+        found = []
+        try:
+            for shard in os.scandir(self.directory):
+                if shard.is_dir():
+                    for entry in os.scandir(shard.path):
+                        if entry.name.endswith('.jpg'):
+                            stat_info = entry.stat()
+                            found.append((stat_info.st_mtime, entry.name[:-4], stat_info.st_size))
+        except FileNotFoundError:
+            pass
+        found.sort()
+        self.entries = OrderedDict((key, [size, mtime]) for mtime, key, size in found)
+        self.total = sum(size for _, _, size in found)
+
+    def get(self, key):
+        """Cached thumbnail bytes, or None"""
+        with self.lock:
+            if self.entries is None:
+                self._load()
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            now = time.time()
+            touch = now - entry[1] > THUMB_TOUCH_INTERVAL
+            if touch:
+                entry[1] = now
+        path = self.path_for(key)
+        try:
+            if touch:
+                os.utime(path)
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Deleted behind our back (e.g. someone cleared the folder)
+            with self.lock:
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.total -= entry[0]
+            return None
+
+    def put(self, key, data):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        with self.lock:
+            if self.entries is None:
+                self._load()
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total -= previous[0]
+            self.entries[key] = [len(data), time.time()]
+            self.total += len(data)
+            evicted = []
+            while self.total > self.max_bytes and len(self.entries) > 1:
+                old_key, (size, _) = self.entries.popitem(last=False)
+                self.total -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self.path_for(old_key))
+            except FileNotFoundError:
+                pass
+
+def render_image_thumbnail(file_path, size):
+    with Image.open(file_path) as image:
+        image.draft('RGB', (size, size))  # JPEGs decode straight at a reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+        if image.mode in ('RGBA', 'LA', 'P', 'PA'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=THUMB_QUALITY, optimize=True)
+        return output.getvalue()
+
+def render_ffmpeg_thumbnail(file_path, size):
+    """First frame of a video (or an image, without Pillow) scaled down, as JPEG"""
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError('ffmpeg is not available')
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-nostdin', '-i', file_path, '-frames:v', '1',
+         '-vf', f"scale='min({size},iw)':'min({size},ih)':force_original_aspect_ratio=decrease,format=yuvj420p",
+         '-f', 'image2pipe', '-c:v', 'mjpeg', '-q:v', '4', 'pipe:1'],
+        capture_output=True, timeout=THUMB_TIMEOUT)
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip() or 'ffmpeg produced no frame')
+    return result.stdout
+
+thumb_cache = ThumbnailCache(THUMB_CACHE_DIR, THUMB_CACHE_MAX_BYTES)
+thumb_executor = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix='thumbnail')
+thumb_pending = {}  # key -> Future, so concurrent requests share one render
+thumb_failures = OrderedDict()  # key -> error, so broken files aren't re-decoded on every listing
+thumb_lock = threading.Lock()
+
+def generate_thumbnail(file_path, category, key, size):
+    try:
+        if category == 'image' and Image is not None:
+            data = render_image_thumbnail(file_path, size)
+        else:
+            data = render_ffmpeg_thumbnail(file_path, size)
+        thumb_cache.put(key, data)
+        return data
+    except Exception as e:
+        with thumb_lock:
+            thumb_failures[key] = str(e) or type(e).__name__
+            while len(thumb_failures) > THUMB_FAILURES_KEPT:
+                thumb_failures.popitem(last=False)
+        raise RuntimeError(thumb_failures[key]) from e
+    finally:
+        with thumb_lock:
+            thumb_pending.pop(key, None)
+
+def get_thumbnail(file_path, category, key, size):
+    """Thumbnail bytes from the cache, or rendered on the worker pool"""
+    data = thumb_cache.get(key)
+    if data is not None:
+        return data
+    with thumb_lock:
+        if key in thumb_failures:
+            raise RuntimeError(thumb_failures[key])
+        future = thumb_pending.get(key)
+        if future is None:
+            future = thumb_executor.submit(generate_thumbnail, file_path, category, key, size)
+            thumb_pending[key] = future
+    return future.result(timeout=THUMB_TIMEOUT)
+
+@app.route('/api/thumb')
+def get_thumb():
+    """JPEG thumbnail of an image or the first frame of a video.
+
+    size is the longest edge (rounded up to one of THUMB_SIZES). Pass v (e.g. the
+    file's mtime and size) to get a response the browser may cache for a year.
+    """
+    file_path = request.args.get('path', '')
+
+    # Security check
+    if not is_safe_path(file_path):
+        return jsonify({'error': 'Access denied'}), 403
+
+    try:
+        stat_info = os.stat(file_path)
+    except OSError:
+        return jsonify({'error': 'File not found'}), 404
+    if not stat.S_ISREG(stat_info.st_mode):
+        return jsonify({'error': 'File not found'}), 404
+
+    category = get_extension_type(os.path.splitext(file_path)[1].lower())[1]
+    if category not in ('image', 'video'):
+        return jsonify({'error': 'Thumbnails are only available for images and videos'}), 415
+    try:
+        requested = int(request.args.get('size', 256))
+    except ValueError:
+        return jsonify({'error': 'size must be an integer'}), 400
+    size = next((s for s in THUMB_SIZES if s >= requested), THUMB_SIZES[-1])
+
+    try:
+        key = f"{content_fingerprint(file_path, stat_info.st_ino, stat_info.st_size, stat_info.st_mtime_ns)}-{size}"
+    except OSError:
+        return jsonify({'error': 'Permission denied'}), 403
+    if request.if_none_match.contains(key):
+        # The browser's copy is current; skip the disk read entirely
+        response = Response(status=304)
+    else:
+        try:
+            data = get_thumbnail(file_path, category, key, size)
+        except FutureTimeoutError:
+            return jsonify({'error': 'Thumbnail is still being generated'}), 504
+        except RuntimeError as e:
+            return jsonify({'error': f'Cannot generate thumbnail: {str(e)}'}), 415
+        response = Response(data, mimetype='image/jpeg')
+    response.set_etag(key)
+    if request.args.get('v'):
+        response.headers['Cache-Control'] = f'private, max-age={THUMB_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Streamed zip downloads
+ZIP_CHUNK_SIZE = 1024 * 1024  # Read size per file and minimum size of a yielded chunk
+# Already-compressed formats (and model weights, which barely deflate) are stored as-is
+ZIP_STORED_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.webp', '.gif', '.avif', '.heic',
+    '.mp4', '.webm', '.mov', '.mkv', '.avi', '.m4v', '.mp3', '.m4a', '.ogg', '.opus', '.flac',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar',
+    '.safetensors', '.ckpt', '.pt', '.pth', '.bin', '.gguf', '.onnx',
+}
+
+class ZipStreamSink(io.RawIOBase):
+    """Unseekable file object that collects zip output until the response generator takes it.
+
+    zipfile writes data descriptors after each entry when it can't seek back,
+    so the archive never has to exist in full anywhere.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+def get_zip_compression(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    return zipfile.ZIP_STORED if ext in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+def iter_zip_entries(paths):
+    """(file path, archive name) pairs: files by name, folders with their structure"""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path, os.path.basename(path)
+        elif os.path.isdir(path):
+            folder_name = os.path.basename(os.path.normpath(path))
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    yield file_path, os.path.join(folder_name, os.path.relpath(file_path, path))
+
+def stream_zip(entries):
+    """Generate a zip archive of (file path, archive name) entries chunk by chunk"""
+    sink = ZipStreamSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file_path, arcname in entries:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                zinfo.compress_type = get_zip_compression(file_path)
+                with open(file_path, 'rb') as src, zipf.open(zinfo, 'w') as dest:
+                    while True:
+                        data = src.read(ZIP_CHUNK_SIZE)
+                        if not data:
+                            break
+                        dest.write(data)
+                        if sink.size >= ZIP_CHUNK_SIZE:
+                            yield sink.take()
+            except OSError as e:
+                # Headers are already sent, so an unreadable file is left out instead
+                print(f"Skipping {file_path} in zip download: {e}")
+            if sink.size:
+                yield sink.take()
+    yield sink.take()
+
+def zip_response(entries, download_name):
+    """Streaming response for a zip of entries; the first bytes go out immediately"""
+    return streaming_download(stream_zip(entries), 'application/zip', download_name)
+
+def streaming_download(chunks, mimetype, download_name):
+    """Attachment response whose body is generated while it is sent"""
+    response = Response(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = content_disposition('attachment', download_name)
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the whole archive
+    return response
+
+def secure_download_name(name):
+    """ASCII fallback for the Content-Disposition filename parameter"""
+    return ''.join(c if c.isascii() and c.isprintable() and c not in '"\\' else '_' for c in name)
+
+def content_disposition(disposition, name):
+    """inline/attachment header with an ASCII filename and the UTF-8 original"""
+    return f"{disposition}; filename=\"{secure_download_name(name)}\"; filename*=UTF-8''{quote(name)}"
 
 @app.route('/api/download_multiple', methods=['POST'])
 def download_multiple():
@@ -280,32 +1578,7 @@ def download_multiple():
         if not os.path.exists(file_path):
             return jsonify({'error': f'File not found: {file_path}'}), 404
     
-    # Create temporary zip file
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, 'selected_files.zip')
-    
-    try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in files:
-                if os.path.isfile(file_path):
-                    # Use just the filename for files
-                    arcname = os.path.basename(file_path)
-                    zipf.write(file_path, arcname)
-                elif os.path.isdir(file_path):
-                    # For directories, preserve structure
-                    folder_name = os.path.basename(file_path)
-                    for root, dirs, files_in_dir in os.walk(file_path):
-                        for file in files_in_dir:
-                            file_full_path = os.path.join(root, file)
-                            arcname = os.path.join(folder_name, os.path.relpath(file_full_path, file_path))
-                            zipf.write(file_full_path, arcname)
-        
-        return send_file(zip_path, as_attachment=True, download_name='selected_files.zip')
-    except Exception as e:
-        return jsonify({'error': f'Error creating zip: {str(e)}'}), 500
-    finally:
-        # Clean up will happen after send_file completes
-        pass
+    return zip_response(iter_zip_entries(files), 'selected_files.zip')
 
 @app.route('/api/download_folder')
 def download_folder():
@@ -319,22 +1592,272 @@ def download_folder():
     if not os.path.exists(folder_path) or not os.path.isdir(folder_path):
         return jsonify({'error': 'Folder not found'}), 404
     
-    # Create temporary zip file
-    temp_dir = tempfile.mkdtemp()
-    folder_name = os.path.basename(folder_path) or 'files'
-    zip_path = os.path.join(temp_dir, f"{folder_name}.zip")
-    
+    folder_name = os.path.basename(os.path.normpath(folder_path)) or 'files'
+    entries = ((file_path, os.path.relpath(file_path, folder_path))
+               for file_path, _ in iter_zip_entries([folder_path]))
+    return zip_response(entries, f"{folder_name}.zip")
+
+# Bulk exports: entries are compressed in parallel and streamed as a zip or tar.zst
+try:
+    USABLE_CPUS = len(os.sched_getaffinity(0))  # The pod's share, not the host's core count
+except AttributeError:
+    USABLE_CPUS = os.cpu_count() or 4
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', min(8, USABLE_CPUS)))
+EXPORT_CHUNK_SIZE = 4 * 1024 * 1024  # Independently deflated piece of a file
+EXPORT_MAX_INFLIGHT = 64 * 1024 * 1024  # Source bytes buffered per export request, whatever the worker count
+EXPORT_WINDOW = max(1, EXPORT_MAX_INFLIGHT // EXPORT_CHUNK_SIZE)  # Chunks in flight per request
+EXPORT_DEFAULT_LEVELS = {'zip': 6, 'tar.zst': 3}
+EXPORT_LEVEL_RANGES = {'zip': (0, 9), 'tar.zst': (1, 22)}
+ZIP64_LIMIT = 0xFFFFFFFF
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # tar.zst exports need `pip install zstandard`
+
+def deflate_chunk(data, level, final):
+    """Raw deflate one chunk. Non-final chunks end on a byte-aligned sync flush,
+    so independently compressed chunks concatenate into one valid stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+def dos_datetime(timestamp):
+    t = time.localtime(max(timestamp, 315532800))  # The zip format starts at 1980
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+class ZipStreamWriter:
+    """Builds zip records for entries written strictly in order with data descriptors.
+
+    Sizes and CRCs are only known after an entry's data has been produced, so
+    each local header is followed by the data and then a descriptor; the
+    central directory at the end carries the final values (with zip64 fields
+    where sizes, offsets or the entry count need them).
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.central = []
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    def local_header(self, entry):
+        entry['offset'] = self.offset
+        name = entry['name'].encode('utf-8')
+        extra = struct.pack('<HHQQ', 1, 16, 0, 0) if entry['zip64'] else b''
+        size_field = ZIP64_LIMIT if entry['zip64'] else 0
+        header = struct.pack('<IHHHHHIIIHH', 0x04034b50, 45 if entry['zip64'] else 20, 0x0808,
+                             entry['method'], entry['time'], entry['date'], 0, size_field, size_field,
+                             len(name), len(extra))
+        return self._emit(header + name + extra)
+
+    def data(self, data):
+        return self._emit(data)
+
+    def data_descriptor(self, entry):
+        self.central.append(entry)
+        if entry['zip64']:
+            return self._emit(struct.pack('<IIQQ', 0x08074b50, entry['crc'], entry['compressed'], entry['size']))
+        return self._emit(struct.pack('<IIII', 0x08074b50, entry['crc'], entry['compressed'], entry['size']))
+
+    def central_directory(self):
+        start = self.offset
+        records = []
+        for entry in self.central:
+            name = entry['name'].encode('utf-8')
+            zip64 = [value for value in (entry['size'], entry['compressed'], entry['offset']) if value >= ZIP64_LIMIT]
+            extra = struct.pack('<HH', 1, 8 * len(zip64)) + struct.pack(f'<{len(zip64)}Q', *zip64) if zip64 else b''
+            records.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | 45, 45 if zip64 or entry['zip64'] else 20, 0x0808,
+                entry['method'], entry['time'], entry['date'], entry['crc'],
+                min(entry['compressed'], ZIP64_LIMIT), min(entry['size'], ZIP64_LIMIT),
+                len(name), len(extra), 0, 0, 0, (entry['mode'] & 0xFFFF) << 16, min(entry['offset'], ZIP64_LIMIT)
+            ) + name + extra)
+        directory = b''.join(records)
+        size = len(directory)
+        count = len(self.central)
+        end = b''
+        if count >= 0xFFFF or size >= ZIP64_LIMIT or start >= ZIP64_LIMIT:
+            zip64_end = start + size
+            end += struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, size, start)
+            end += struct.pack('<IIQI', 0x07064b50, 0, zip64_end, 1)
+        end += struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                           min(size, ZIP64_LIMIT), min(start, ZIP64_LIMIT), 0)
+        return self._emit(directory + end)
+
+def stream_parallel_zip(entries, level):
+    """Zip (file path, archive name) entries, deflating chunks on EXPORT_WORKERS threads.
+
+    zlib releases the GIL while compressing, so threads use every core without
+    copying file data to worker processes. Chunks are consumed in submission
+    order; at most EXPORT_WINDOW chunks (EXPORT_MAX_INFLIGHT bytes) are in flight.
+    """
+    writer = ZipStreamWriter()
+    pending = deque()  # (kind, entry, future) in archive order
+
+    def drain(keep):
+        while len(pending) > keep:
+            kind, entry, future = pending.popleft()
+            if kind == 'header':
+                yield writer.local_header(entry)
+            elif kind == 'data':
+                data = future.result()
+                entry['compressed'] += len(data)
+                yield writer.data(data)
+            else:
+                yield writer.data_descriptor(entry)
+
+    with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+        for file_path, arcname in entries:
+            try:
+                stat_info = os.stat(file_path)
+                src = open(file_path, 'rb')
+            except OSError as e:
+                print(f"Skipping {file_path} in export: {e}")
+                continue
+            compress = level > 0 and get_zip_compression(file_path) == zipfile.ZIP_DEFLATED
+            entry = {'name': arcname, 'method': 8 if compress else 0, 'mode': stat_info.st_mode,
+                     'zip64': stat_info.st_size * 1.05 > ZIP64_LIMIT, 'crc': 0, 'size': 0, 'compressed': 0}
+            entry['time'], entry['date'] = dos_datetime(stat_info.st_mtime)
+            pending.append(('header', entry, None))
+
+            with src:
+                data = src.read(EXPORT_CHUNK_SIZE)
+                while True:
+                    next_data = src.read(EXPORT_CHUNK_SIZE) if data else b''
+                    final = not next_data
+                    entry['crc'] = zlib.crc32(data, entry['crc'])
+                    entry['size'] += len(data)
+                    if compress:
+                        future = pool.submit(deflate_chunk, data, level, final)
+                    else:
+                        future = Future()
+                        future.set_result(data)
+                    pending.append(('data', entry, future))
+                    yield from drain(EXPORT_WINDOW)
+                    if final:
+                        break
+                    data = next_data
+            pending.append(('end', entry, None))
+        yield from drain(0)
+    yield writer.central_directory()
+
+class ExportCancelled(Exception):
+    pass
+
+class QueueSink(io.RawIOBase):
+    """Write end of a bounded queue, for archive writers that run on their own thread.
+
+    Writes raise ExportCancelled once cancelled is set, so the writer stops in the
+    middle of a file instead of compressing the rest of it for nobody.
+    """
+
+    def __init__(self, chunks, cancelled):
+        super().__init__()
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        self.chunks.put(bytes(data))
+        return len(data)
+
+def stream_tar_zst(entries, level):
+    """tar archive of (file path, archive name) entries through multi-threaded zstd"""
+    chunks = queue.Queue(maxsize=EXPORT_WINDOW)
+    done = object()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            compressor = zstandard.ZstdCompressor(level=level, threads=EXPORT_WORKERS)
+            with compressor.stream_writer(QueueSink(chunks, cancelled), closefd=False) as compressed:
+                with tarfile.open(fileobj=compressed, mode='w|') as tar:
+                    for file_path, arcname in entries:
+                        if cancelled.is_set():
+                            return
+                        try:
+                            tar.add(file_path, arcname, recursive=False)
+                        except OSError as e:
+                            print(f"Skipping {file_path} in export: {e}")
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            print(f"Error writing tar.zst export: {e}")
+        finally:
+            chunks.put(done)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, folder_path)
-                    zipf.write(file_path, arcname)
-        
-        return send_file(zip_path, as_attachment=True, download_name=f"{folder_name}.zip")
-    except Exception as e:
-        return jsonify({'error': f'Error creating zip: {str(e)}'}), 500
+        while True:
+            data = chunks.get()
+            if data is done:
+                break
+            yield data
+    finally:
+        # Client went away: stop the producer and unblock it if it is waiting to put
+        cancelled.set()
+        while producer.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+@app.route('/api/export', methods=['GET', 'POST'])
+def export_files():
+    """Export a folder (GET path=...) or a selection (POST {"files": [...]}) as a zip or tar.zst.
+
+    Entries are compressed in parallel. format is zip (default) or tar.zst;
+    level is 0-9 for zip (0 stores everything) or 1-22 for tar.zst.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args
+    export_format = data.get('format', 'zip')
+    if export_format not in EXPORT_LEVEL_RANGES:
+        return jsonify({'error': 'format must be zip or tar.zst'}), 400
+    if export_format == 'tar.zst' and zstandard is None:
+        return jsonify({'error': 'tar.zst export needs the zstandard package'}), 501
+    try:
+        level = int(data.get('level', EXPORT_DEFAULT_LEVELS[export_format]))
+    except (TypeError, ValueError):
+        level = -1
+    low, high = EXPORT_LEVEL_RANGES[export_format]
+    if not low <= level <= high:
+        return jsonify({'error': f'level must be between {low} and {high}'}), 400
+    
+    if request.method == 'POST':
+        files = data.get('files', [])
+        if not files:
+            return jsonify({'error': 'No files specified'}), 400
+        for file_path in files:
+            if not is_safe_path(file_path):
+                return jsonify({'error': f'Access denied to {file_path}'}), 403
+            if not os.path.exists(file_path):
+                return jsonify({'error': f'File not found: {file_path}'}), 404
+        entries = iter_zip_entries(files)
+        name = 'selected_files'
+    else:
+        folder_path = data.get('path', '')
+        if not is_safe_path(folder_path):
+            return jsonify({'error': 'Access denied'}), 403
+        if not os.path.isdir(folder_path):
+            return jsonify({'error': 'Folder not found'}), 404
+        entries = ((file_path, os.path.relpath(file_path, folder_path))
+                   for file_path, _ in iter_zip_entries([folder_path]))
+        name = os.path.basename(os.path.normpath(folder_path)) or 'files'
+    
+    if export_format == 'zip':
+        return streaming_download(stream_parallel_zip(entries, level), 'application/zip', f"{name}.zip")
+    return streaming_download(stream_tar_zst(entries, level), 'application/zstd', f"{name}.tar.zst")
 
 @app.route('/api/delete', methods=['POST'])
 def delete_items():
@@ -466,6 +1989,364 @@ def upload_file():
         'success': len(errors) == 0
     })
 
+# Chunked uploads: init reserves <target>.part, chunks are pwritten into it in any
+# order (and in parallel), complete verifies and renames it into place. Session state
+# lives in UPLOAD_STATE_DIR so an interrupted upload can pick up the missing chunks.
+UPLOAD_STATE_DIR = "/workspace/.uploads"
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+UPLOAD_CHUNK_SIZE_RANGE = (1024 * 1024, 256 * 1024 * 1024)
+UPLOAD_READ_SIZE = 1024 * 1024  # Request body read per pwrite
+UPLOAD_EXPIRY = 7 * 24 * 3600  # Seconds before an untouched upload is discarded
+UPLOAD_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+@contextlib.contextmanager
+def upload_state_lock():
+    """Serialize session state read-modify-writes across server worker processes"""
+    os.makedirs(UPLOAD_STATE_DIR, exist_ok=True)
+    with open(os.path.join(UPLOAD_STATE_DIR, '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+class UploadSession:
+    """One chunked upload of size bytes to target"""
+
+    def __init__(self, upload_id, target, size, chunk_size, sha256=None, received=()):
+        self.upload_id = upload_id
+        self.target = target
+        self.size = size
+        self.chunk_size = chunk_size
+        self.sha256 = sha256
+        self.received = set(received)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_id(target, size, fingerprint=None):
+        """Same file to the same place gives the same id, so re-initialising resumes.
+
+        Name and size alone don't identify a file, so resuming needs the client's
+        fingerprint of its content; without one every upload gets a fresh random id.
+        """
+        if not fingerprint:
+            return secrets.token_hex(16)
+        return hashlib.sha256(f"{target}\0{size}\0{fingerprint}".encode()).hexdigest()[:32]
+
+    @property
+    def part_path(self):
+        return self.target + '.part'
+
+    @property
+    def state_path(self):
+        return os.path.join(UPLOAD_STATE_DIR, f"{self.upload_id}.json")
+
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
+
+    def chunk_range(self, index):
+        """(offset, length) of chunk index"""
+        offset = index * self.chunk_size
+        return offset, min(self.chunk_size, self.size - offset)
+
+    def missing(self):
+        return [index for index in range(self.chunk_count) if index not in self.received]
+
+    def to_dict(self):
+        with self.lock:
+            received = sorted(self.received)
+        return {
+            'upload_id': self.upload_id,
+            'path': self.target,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'chunk_count': self.chunk_count,
+            'received': received,
+            'received_bytes': sum(self.chunk_range(index)[1] for index in received),
+        }
+
+    def _merge_saved(self):
+        """Add chunks recorded by other server worker processes (call under upload_state_lock)"""
+        try:
+            with open(self.state_path) as f:
+                self.received.update(json.load(f).get('received', ()))
+        except (OSError, ValueError):
+            pass
+
+    def refresh(self):
+        with self.lock, upload_state_lock():
+            self._merge_saved()
+
+    def save(self):
+        """Write the session state (call with self.lock held)"""
+        os.makedirs(UPLOAD_STATE_DIR, exist_ok=True)
+        with upload_state_lock():
+            self._merge_saved()
+            temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'target': self.target, 'size': self.size, 'chunk_size': self.chunk_size,
+                           'sha256': self.sha256, 'received': sorted(self.received)}, f)
+            os.replace(temp_path, self.state_path)
+
+    @classmethod
+    def load(cls, upload_id):
+        try:
+            with open(os.path.join(UPLOAD_STATE_DIR, f"{upload_id}.json")) as f:
+                state = json.load(f)
+            session = cls(upload_id, state['target'], state['size'], state['chunk_size'],
+                          state.get('sha256'), state.get('received', ()))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return session if os.path.exists(session.part_path) else None
+
+    def discard(self):
+        for path in (self.part_path, self.state_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+upload_sessions = {}
+upload_sessions_lock = threading.Lock()
+
+def get_upload_session(upload_id):
+    """Active session for upload_id, loaded from UPLOAD_STATE_DIR after a restart
+    (or when another server worker process started it)"""
+    if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+        return None
+    with upload_sessions_lock:
+        session = upload_sessions.get(upload_id)
+        if session is not None and not os.path.exists(session.part_path):
+            # Completed or aborted in another worker process
+            del upload_sessions[upload_id]
+            session = None
+        if session is None:
+            session = UploadSession.load(upload_id)
+            if session is not None:
+                upload_sessions[upload_id] = session
+        return session
+
+def forget_upload_session(session):
+    with upload_sessions_lock:
+        upload_sessions.pop(session.upload_id, None)
+    session.discard()
+
+def forget_uploads_to(target):
+    """Discard every session writing target's .part file, e.g. an earlier upload of a
+    different file to the same place, before a new session takes the file over"""
+    try:
+        entries = list(os.scandir(UPLOAD_STATE_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if not entry.name.endswith('.json'):
+            continue
+        session = get_upload_session(entry.name[:-len('.json')])
+        if session is not None and session.target == target:
+            forget_upload_session(session)
+
+def prune_stale_uploads():
+    """Discard uploads whose state hasn't been touched for UPLOAD_EXPIRY seconds"""
+    try:
+        entries = list(os.scandir(UPLOAD_STATE_DIR))
+    except FileNotFoundError:
+        return
+    cutoff = time.time() - UPLOAD_EXPIRY
+    for entry in entries:
+        upload_id = entry.name[:-len('.json')]
+        if not entry.name.endswith('.json') or entry.stat().st_mtime > cutoff:
+            continue
+        session = get_upload_session(upload_id)
+        if session is not None:
+            forget_upload_session(session)
+        else:
+            os.remove(entry.path)
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(EXPORT_CHUNK_SIZE)
+            if not data:
+                return sha256.hexdigest()
+            sha256.update(data)
+
+def preallocate(fd, size):
+    """Reserve an upload's disk space up front: fails fast on a full disk and keeps
+    parallel chunk writes from fragmenting the file"""
+    if size == 0:
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError) as e:
+        if getattr(e, 'errno', None) == errno.ENOSPC:
+            raise
+        # Not supported on this platform/filesystem (e.g. some network volumes)
+        os.ftruncate(fd, size)
+
+@app.route('/api/upload/init', methods=['POST'])
+def upload_init():
+    """Start or resume a chunked upload.
+
+    Body: {"current_path", "filename", "size", "fingerprint", "chunk_size" (optional),
+    "sha256" (optional)}. fingerprint identifies the file's content (e.g. its
+    modification time and a hash of its first and last bytes). Returns the upload id,
+    chunk layout and the chunks already received, so a client that lost its connection
+    can call this again with the same fingerprint and send only the rest.
+    """
+    data = request.get_json(silent=True) or {}
+    current_path = data.get('current_path', '')
+    filename = data.get('filename', '')
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+    target = os.path.abspath(os.path.join(current_path, filename))
+    if not is_safe_path(current_path) or not is_safe_path(target):
+        return jsonify({'error': 'Access denied'}), 403
+    if os.path.isdir(target):
+        return jsonify({'error': 'A folder with that name already exists'}), 409
+    try:
+        size = int(data.get('size'))
+        chunk_size = int(data.get('chunk_size') or UPLOAD_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size and chunk_size must be integers'}), 400
+    low, high = UPLOAD_CHUNK_SIZE_RANGE
+    if size < 0 or not low <= chunk_size <= high:
+        return jsonify({'error': f'chunk_size must be between {low} and {high} bytes'}), 400
+    expected_sha256 = (data.get('sha256') or '').lower() or None
+    fingerprint = str(data.get('fingerprint') or '')
+    if len(fingerprint) > 256:
+        return jsonify({'error': 'fingerprint must be at most 256 characters'}), 400
+
+    prune_stale_uploads()
+    upload_id = UploadSession.make_id(target, size, fingerprint)
+    session = get_upload_session(upload_id)
+    if session is not None and (session.chunk_size == chunk_size or not data.get('chunk_size')):
+        with session.lock:
+            if expected_sha256:
+                session.sha256 = expected_sha256
+            session.save()
+        return jsonify({**session.to_dict(), 'resumed': True})
+    # A different chunk layout or a different file: earlier chunks for target can't be reused
+    forget_uploads_to(target)
+
+    session = UploadSession(upload_id, target, size, chunk_size, expected_sha256)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd = os.open(session.part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            preallocate(fd, size)
+        finally:
+            os.close(fd)
+        with session.lock:
+            session.save()
+    except OSError as e:
+        session.discard()
+        if e.errno == errno.ENOSPC:
+            return jsonify({'error': 'Not enough disk space'}), 507
+        return jsonify({'error': f'Error starting upload: {str(e)}'}), 500
+    with upload_sessions_lock:
+        upload_sessions[upload_id] = session
+    return jsonify({**session.to_dict(), 'resumed': False})
+
+@app.route('/api/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Chunks received so far"""
+    session = get_upload_session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    session.refresh()
+    return jsonify(session.to_dict())
+
+@app.route('/api/upload/<upload_id>/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Write one chunk (the raw request body) at its offset in the .part file.
+
+    Chunks may arrive in any order and in parallel; re-sending a chunk overwrites it.
+    """
+    session = get_upload_session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    if not 0 <= index < session.chunk_count:
+        return jsonify({'error': f'Chunk index must be below {session.chunk_count}'}), 400
+    offset, length = session.chunk_range(index)
+    if request.content_length != length:
+        return jsonify({'error': f'Chunk {index} must be {length} bytes'}), 400
+
+    written = 0
+    try:
+        fd = os.open(session.part_path, os.O_WRONLY)
+    except FileNotFoundError:
+        return jsonify({'error': 'Upload not found'}), 404
+    try:
+        while written < length:
+            data = request.stream.read(min(UPLOAD_READ_SIZE, length - written))
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                count = os.pwrite(fd, view, offset + written)
+                written += count
+                view = view[count:]
+    except OSError as e:
+        return jsonify({'error': f'Error writing chunk: {str(e)}'}), 500
+    except Exception:
+        # Client went away mid-chunk; the chunk stays missing and can be re-sent
+        return jsonify({'error': f'Chunk {index} incomplete'}), 400
+    finally:
+        os.close(fd)
+    if written != length:
+        return jsonify({'error': f'Chunk {index} incomplete'}), 400
+
+    with session.lock:
+        session.received.add(index)
+        received_count = len(session.received)
+        try:
+            session.save()
+        except OSError:
+            # The chunk is on disk; only a resume after a restart would re-send it
+            pass
+    return jsonify({'index': index, 'received_count': received_count,
+                    'chunk_count': session.chunk_count})
+
+@app.route('/api/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    """Check every chunk arrived (and the sha256, if given) and move the file into place"""
+    session = get_upload_session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    data = request.get_json(silent=True) or {}
+    expected_sha256 = (data.get('sha256') or session.sha256 or '').lower() or None
+
+    session.refresh()
+    with session.lock:
+        missing = session.missing()
+        if missing:
+            return jsonify({'error': f'{len(missing)} chunks missing', 'missing': missing}), 409
+        try:
+            actual_sha256 = file_sha256(session.part_path) if expected_sha256 else None
+            if actual_sha256 != expected_sha256:
+                forget_upload_session(session)
+                return jsonify({'error': 'Checksum mismatch, upload discarded',
+                                'expected': expected_sha256, 'actual': actual_sha256}), 422
+            fd = os.open(session.part_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(session.part_path, session.target)
+        except OSError as e:
+            return jsonify({'error': f'Error completing upload: {str(e)}'}), 500
+    forget_upload_session(session)
+    return jsonify({'success': True, 'path': session.target, 'size': session.size,
+                    'sha256': actual_sha256})
+
+@app.route('/api/upload/<upload_id>', methods=['DELETE'])
+def upload_abort(upload_id):
+    """Cancel an upload and delete its .part file"""
+    session = get_upload_session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    forget_upload_session(session)
+    return jsonify({'success': True})
+
 @app.route('/api/storage_info')
 def get_storage_info():
     """Get storage information"""
@@ -503,66 +2384,87 @@ def get_storage_info():
 
 @app.route('/api/search')
 def search_files():
-    """Search for files and folders"""
+    """Search for files and folders by name.
+
+    mode is substring (default), prefix or glob (default when q contains * ? or [).
+    Results are ranked (exact name, then prefix, then shorter names) and paged
+    with limit/offset; total counts every match.
+    """
     query = request.args.get('q', '').strip()
     path = request.args.get('path', '/workspace/ComfyUI/output')
+    mode = request.args.get('mode') or ('glob' if any(c in query for c in '*?[') else 'substring')
     
     if not query or len(query) < 2:
         return jsonify({'error': 'Search query too short'}), 400
+    if mode not in ('substring', 'prefix', 'glob'):
+        return jsonify({'error': 'mode must be substring, prefix or glob'}), 400
     
     # Security check
     if not is_safe_path(path):
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        results = []
-        query_lower = query.lower()
+        limit = max(1, min(int(request.args.get('limit', SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or offset'}), 400
+    
+    try:
+        path = os.path.normpath(os.path.abspath(path))
+        indexed = file_search_index.covers(path)
+        if indexed:
+            total, matches = file_search_index.search(path, query, mode, limit, offset)
+        else:
+            # Not indexed (yet): walk the tree like before
+            total, matches = walk_search(path, query, mode, limit, offset)
         
-        for root, dirs, files in os.walk(path):
-            # Skip if we can't access the directory
-            if not is_safe_path(root):
-                continue
-                
-            # Search in directory names
-            for dir_name in dirs:
-                if query_lower in dir_name.lower():
-                    dir_path = os.path.join(root, dir_name)
-                    relative_path = os.path.relpath(dir_path, path)
-                    results.append({
-                        'name': dir_name,
-                        'path': dir_path,
-                        'relative_path': relative_path,
-                        'type': 'folder'
-                    })
-            
-            # Search in file names
-            for file_name in files:
-                if query_lower in file_name.lower():
-                    file_path = os.path.join(root, file_name)
-                    relative_path = os.path.relpath(file_path, path)
-                    file_info = get_file_info(file_path)
-                    if file_info:
-                        results.append({
-                            'name': file_name,
-                            'path': file_path,
-                            'relative_path': relative_path,
-                            'type': 'file',
-                            'size_formatted': file_info['size_formatted'],
-                            'category': file_info['category']
-                        })
-            
-            # Limit results for performance
-            if len(results) > 100:
-                break
+        results = []
+        for match_path, name, is_dir in matches:
+            result = {
+                'name': name,
+                'path': match_path,
+                'relative_path': os.path.relpath(match_path, path),
+                'type': 'folder' if is_dir else 'file'
+            }
+            if not is_dir:
+                file_info = get_file_info(match_path)
+                if file_info is None:
+                    continue  # Deleted since it was indexed
+                result['size_formatted'] = file_info['size_formatted']
+                result['category'] = file_info['category']
+            results.append(result)
         
         return jsonify({
             'results': results,
-            'total': len(results),
-            'truncated': len(results) >= 100
+            'total': total,
+            'offset': offset,
+            'has_more': offset + len(matches) < total,
+            'truncated': offset + len(matches) < total,
+            'indexed': indexed
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def walk_search(path, query, mode, limit, offset):
+    """Unindexed fallback for search_files: (total matches, [(path, name, is_dir)])"""
+    query = query.lower()
+    if mode == 'glob':
+        matches_name = lambda name: fnmatch.fnmatchcase(name.lower(), query)
+    elif mode == 'prefix':
+        matches_name = lambda name: name.lower().startswith(query)
+    else:
+        matches_name = lambda name: query in name.lower()
+    
+    found = []
+    for root, dirs, files in os.walk(path):
+        for names, is_dir in ((dirs, True), (files, False)):
+            for name in names:
+                if matches_name(name):
+                    found.append((os.path.join(root, name), name, is_dir))
+    found.sort(key=lambda m: (m[1].lower() != query, not m[1].lower().startswith(query),
+                              len(m[1]), len(m[0]), m[0]))
+    return len(found), found[offset:offset + limit]
+
 @app.route('/video-calculator')
 def video_calculator():
     """Serve the video overlap calculator page."""
@@ -573,74 +2475,458 @@ def unianimate_interface():
     """Serve the UniAnimate-DiT interface page."""
     return render_template('unianimate_interface.html')
 
-# Add installation status functions
+# Installation status, polled by installation_status.html. Logs are followed
+# incrementally and processes found through /proc, and one snapshot is shared by
+# every client polling within INSTALL_STATUS_TTL.
+INSTALL_PROGRESS_LOG = "/workspace/installation_progress.log"
+INSTALL_STATUS_FILE = "/workspace/installation_status.json"  # Written by older installation_logger.sh
+INSTALL_EVENTS_FILE = "/workspace/installation_events.jsonl"
+WHEELHOUSE_DIR = "/workspace/.wheelhouse"  # Wheels cached by wheelhouse.py
+INSTALL_FINAL_STATUSES = ('completed', 'failed', 'skipped', 'blocked', 'manual_required')
+SAGEATTENTION_LOG = "/workspace/sageattention_install.log"
+COMFYUI_MAIN = "/workspace/ComfyUI/main.py"
+INSTALL_STATUS_TTL = 2  # Seconds
+INSTALL_LOG_BUFFER_BYTES = 1024 * 1024  # Recent lines of each log kept in memory
+INSTALL_LOG_MAX_RESPONSE = 256 * 1024  # Bytes per /api/installation-log response
+INSTALL_LOG_TAIL_BYTES = 64 * 1024  # Where a client without an offset starts, and the tail in the status
+SAGEATTENTION_DONE = "installation completed!"
+
+class LogTail:
+    """Follows a growing log file, reading only the bytes appended since the last refresh.
+
+    The most recent complete lines (about INSTALL_LOG_BUFFER_BYTES) are kept in memory
+    with their byte offsets, so clients polling /api/installation-log?since=<offset>
+    are served without touching the file; older offsets are read from it with a seek.
+    markers are lowercase phrases remembered once they appear anywhere in the log.
+    """
+
+    def __init__(self, path, markers=()):
+        self.path = path
+        self.markers = markers
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.log_id = None
+        self.id_complete = False
+        self.offset = 0  # File bytes consumed so far
+        self.lines = deque()  # (offset, complete line including its newline)
+        self.buffered = 0
+        self.partial = b''  # Trailing bytes not yet terminated by a newline
+        self.seen = set()
+
+    def _identify(self, f, inode):
+        """Changes when the file is replaced or rewritten from the start.
+
+        Derived from the file alone, so every worker process gives the same id. Until
+        the file has 256 bytes it is just the inode, which the full id starts with.
+        """
+        head = f.read(256)
+        self.id_complete = len(head) == 256
+        self.log_id = f"{inode:x}-{zlib.crc32(head):08x}" if self.id_complete else f"{inode:x}"
+
+    def _scan_markers(self, data):
+        recent = data.lower()
+        self.seen.update(marker for marker in self.markers if marker.encode() in recent)
+
+    def refresh(self):
+        """Pick up appended bytes (call with self.lock held)"""
+        try:
+            stat_info = os.stat(self.path)
+        except OSError:
+            if self.inode is not None:
+                self._reset(None)
+            return
+        size = stat_info.st_size
+        if stat_info.st_ino != self.inode or size < self.offset:
+            # Replaced or truncated, e.g. by a fresh installation
+            self._reset(stat_info.st_ino)
+        if size == self.offset and self.log_id is not None:
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                if not self.id_complete:
+                    self._identify(f, stat_info.st_ino)
+                if self.offset == 0 and size > INSTALL_LOG_BUFFER_BYTES:
+                    # Only the end is buffered; the rest is scanned for markers and served by seek
+                    f.seek(0)
+                    overlap = b''
+                    while f.tell() < size - INSTALL_LOG_BUFFER_BYTES:
+                        block = f.read(min(1024 * 1024, size - INSTALL_LOG_BUFFER_BYTES - f.tell()))
+                        self._scan_markers(overlap + block)
+                        overlap = block[-64:]
+                    start = f.tell()
+                    block = f.read(size - start)
+                    self._scan_markers(overlap + block)
+                    # Start the buffer on a line boundary
+                    cut = block.find(b'\n') + 1
+                    self.offset = start + cut
+                    data = block[cut:]
+                else:
+                    f.seek(self.offset)
+                    data = f.read(size - self.offset)
+                    self._scan_markers(self.partial[-64:] + data)
+        except OSError:
+            return
+
+        line_offset = self.offset - len(self.partial)
+        self.offset += len(data)
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        position = 0
+        while position < end:
+            newline = data.index(b'\n', position) + 1
+            self.lines.append((line_offset + position, data[position:newline]))
+            self.buffered += newline - position
+            position = newline
+        while self.buffered > INSTALL_LOG_BUFFER_BYTES and len(self.lines) > 1:
+            self.buffered -= len(self.lines.popleft()[1])
+
+    @property
+    def end(self):
+        """Offset just past the last complete line"""
+        return self.offset - len(self.partial)
+
+    def read_since(self, since=None, log_id=None, limit=INSTALL_LOG_MAX_RESPONSE):
+        """Complete lines from byte offset since (default: the recent tail).
+
+        Returns {'text', 'offset', 'next_offset', 'size', 'log_id', 'reset'}; reset means
+        the file was replaced or truncated and the client should discard what it has.
+        """
+        with self.lock:
+            self.refresh()
+            end = self.end
+            reset = (log_id is not None and log_id != self.log_id
+                     and not (self.log_id or '').startswith(log_id + '-'))
+            if since is None or reset or since > end:
+                reset = reset or since is not None
+                since = self._tail_start(INSTALL_LOG_TAIL_BYTES)
+            buffer_start = self.lines[0][0] if self.lines else end
+            if since >= buffer_start:
+                chunks = []
+                for offset, line in reversed(self.lines):
+                    if offset < since:
+                        break
+                    chunks.append((offset, line))
+                chunks.reverse()
+                # Whole lines under the limit, but always at least one so the client moves on
+                length = 0
+                for count, (offset, line) in enumerate(chunks):
+                    length += len(line)
+                    if length > limit and count:
+                        chunks = chunks[:count]
+                        break
+                start = chunks[0][0] if chunks else end
+                data = b''.join(line for offset, line in chunks)
+            else:
+                start = since
+                data = self._read_file(since, min(limit, buffer_start - since))
+            log_id = self.log_id
+        return {
+            'text': data.decode('utf-8', errors='replace'),
+            'offset': start,
+            'next_offset': start + len(data),
+            'size': end,
+            'log_id': log_id,
+            'reset': reset,
+        }
+
+    def _tail_start(self, nbytes):
+        """Offset of the first buffered line within the last nbytes (call with self.lock held)"""
+        start = self.end
+        for offset, line in reversed(self.lines):
+            if self.end - offset > nbytes:
+                break
+            start = offset
+        return start
+
+    def _read_file(self, since, nbytes):
+        """Whole lines from the file at since, from before the in-memory buffer"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(since)
+                data = f.read(nbytes)
+        except OSError:
+            return b''
+        cut = data.rfind(b'\n') + 1
+        return data[:cut] if cut else data
+
+    def tail_text(self, nbytes):
+        """The last nbytes or so of complete lines, as text"""
+        with self.lock:
+            self.refresh()
+            start = self._tail_start(nbytes)
+            data = b''.join(line for offset, line in self.lines if offset >= start)
+        return data.decode('utf-8', errors='replace')
+
+    def has_seen(self, marker):
+        with self.lock:
+            self.refresh()
+            return marker in self.seen
+
+class ProcessMonitor:
+    """Whether a process whose command line matches pattern is running, via /proc instead of pgrep.
+
+    The last matching PID is checked first, so a running service costs one small read.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+        self.pid = None
+
+    def _matches(self, pid):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode(errors='replace')
+        except OSError:
+            return False
+        return self.pattern.search(cmdline) is not None
+
+    def is_running(self):
+        if self.pid is not None and self._matches(self.pid):
+            return True
+        self.pid = None
+        try:
+            pids = [name for name in os.listdir('/proc') if name.isdigit()]
+        except OSError:
+            return False
+        own_pid = str(os.getpid())
+        for pid in pids:
+            if pid != own_pid and self._matches(pid):
+                self.pid = pid
+                return True
+        return False
+
+progress_log_tail = LogTail(INSTALL_PROGRESS_LOG)
+sageattention_log_tail = LogTail(SAGEATTENTION_LOG, markers=(SAGEATTENTION_DONE,))
+comfyui_process = ProcessMonitor(r'python.*main\.py.*--port.*8188')
+model_downloader_process = ProcessMonitor(r'python.*model_downloader')
+install_status_snapshot = {'time': 0, 'body': None, 'etag': None}
+install_status_lock = threading.Lock()
+
+class InstallEventLog:
+    """Materialized installation status, folded from the append-only event log.
+
+    installation_logger.sh and installation_events.py append one JSON event per line;
+    only lines appended since the last call are parsed. status has the shape
+    installation_status.json had: {component: status, ..., 'last_updated': time}.
+    steps holds each component's timing in the current boot: {'status', 'started',
+    'finished', 'duration', 'start', 'end'} (start/end on the seconds-since-boot clock).
+    boot describes the current boot (start_services.sh reports one per pod start).
+    wheels counts wheelhouse.py lookups: {'hits', 'misses', 'seconds_saved', 'seconds_built', 'last'}.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.offset = 0
+        self.partial = b''
+        self.status = {}
+        self.steps = {}
+        self.boot = {}
+        self.wheels = {'hits': 0, 'misses': 0, 'seconds_saved': 0.0, 'seconds_built': 0.0, 'last': {}}
+
+    def fold(self, event):
+        """Apply one event (step events only feed the text log for now)"""
+        kind = event.get('event')
+        if kind == 'boot':
+            # Timings restart with every pod start; component statuses carry over
+            self.steps = {}
+            self.boot = {'mono': event.get('mono'), 'time': event.get('time'),
+                         'resuming': event.get('resuming') == 'true', 'template_version': None}
+            return
+        if kind == 'template':
+            self.boot['template_version'] = event.get('version')
+            return
+        if kind == 'wheel':
+            hit = event.get('result') == 'hit'
+            self.wheels['hits' if hit else 'misses'] += 1
+            # A hit saves the time its wheel originally took to build
+            self.wheels['seconds_saved' if hit else 'seconds_built'] += event.get('build_seconds') or 0
+            self.wheels['last'][event.get('name')] = {'result': event.get('result'), 'key': event.get('key'),
+                                                      'time': event.get('time')}
+            return
+        if kind != 'status' or 'component' not in event:
+            return
+        component, status = event['component'], event.get('status')
+        self.status[component] = status
+        if 'time' in event:
+            self.status['last_updated'] = event['time']
+
+        timing = self.steps.setdefault(component, {'status': None, 'started': None, 'finished': None,
+                                                   'duration': None, 'start': None, 'end': None})
+        ts, mono = event.get('ts'), event.get('mono')
+        if status in INSTALL_FINAL_STATUSES:
+            if timing['status'] in INSTALL_FINAL_STATUSES and timing['start'] is not None:
+                # Repeated, e.g. one "ready" per gunicorn worker: the first one counts
+                timing['status'] = status
+                return
+            timing.update(finished=ts, end=mono)
+            if 'duration' in event:
+                timing['duration'] = event['duration']
+            elif timing['status'] not in INSTALL_FINAL_STATUSES:
+                if mono is not None and timing['start'] is not None:
+                    timing['duration'] = round(mono - timing['start'], 2)
+                elif ts is not None and timing['started'] is not None:
+                    timing['duration'] = round(ts - timing['started'], 1)
+        elif timing['status'] in INSTALL_FINAL_STATUSES or timing['started'] is None:
+            # Started (again); later in-progress statuses like cloning -> installing keep the start
+            timing.update(started=ts, start=mono, finished=None, end=None, duration=None)
+        timing['status'] = status
+
+    def refresh(self):
+        """Fold the events appended since the last call (call with self.lock held)"""
+        try:
+            stat_info = os.stat(self.path)
+        except OSError:
+            if self.inode is not None:
+                self._reset(None)
+            return
+        if stat_info.st_ino != self.inode or stat_info.st_size < self.offset:
+            self._reset(stat_info.st_ino)  # A fresh installation replaced the log
+        if stat_info.st_size == self.offset:
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(stat_info.st_size - self.offset)
+        except OSError:
+            return
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()  # Not terminated yet
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # Skip a damaged line rather than losing the rest
+            if isinstance(event, dict):
+                self.fold(event)
+
+    def read(self):
+        """Current status ({} while there is no event log)"""
+        with self.lock:
+            self.refresh()
+            return dict(self.status)
+
+    def read_steps(self):
+        """Timing of each component, in the order they first reported"""
+        with self.lock:
+            self.refresh()
+            return {name: dict(timing) for name, timing in self.steps.items()}
+
+    def read_wheels(self):
+        """Wheelhouse hits and misses over the whole event log"""
+        with self.lock:
+            self.refresh()
+            return {**self.wheels, 'last': dict(self.wheels['last'])}
+
+    def read_profile(self):
+        """The current boot's startup timeline, with times in seconds since the boot began"""
+        with self.lock:
+            self.refresh()
+            steps = {name: dict(timing) for name, timing in self.steps.items()}
+            boot = dict(self.boot)
+        starts = [timing['start'] for timing in steps.values() if timing['start'] is not None]
+        origin = boot.get('mono') if boot.get('mono') is not None else min(starts, default=None)
+
+        def offset(value):
+            return round(value - origin, 2) if value is not None and origin is not None else None
+
+        phases = [{'name': name, 'status': timing['status'], 'start': offset(timing['start']),
+                   'end': offset(timing['end']), 'duration': timing['duration']}
+                  for name, timing in steps.items()]
+        phases.sort(key=lambda phase: (phase['start'] is None, phase['start'] or 0))
+        comfyui = steps.get('comfyui', {})
+        return {
+            'boot_time': boot.get('time'),
+            'resuming': boot.get('resuming'),
+            'template_version': boot.get('template_version'),
+            # Pod start to ComfyUI answering on port 8188
+            'comfyui_ready': offset(comfyui.get('end')) if comfyui.get('status') == 'completed' else None,
+            'phases': phases,
+        }
+
+install_events = InstallEventLog(INSTALL_EVENTS_FILE)
+
+def wheelhouse_status():
+    """Cache hits and misses from the event log, and what the wheelhouse holds per ABI key"""
+    status = install_events.read_wheels()
+    cached = {}
+    try:
+        key_dirs = os.scandir(WHEELHOUSE_DIR)
+    except OSError:
+        key_dirs = []
+    for key_dir in key_dirs:
+        if not key_dir.is_dir():
+            continue
+        wheels = [entry for entry in os.scandir(key_dir.path) if entry.name.endswith('.whl')]
+        cached[key_dir.name] = {'wheels': sorted(entry.name for entry in wheels),
+                                'size': sum(entry.stat().st_size for entry in wheels)}
+    status['cached'] = cached
+    status['seconds_saved'] = round(status['seconds_saved'], 1)
+    status['seconds_built'] = round(status['seconds_built'], 1)
+    return status
+
+legacy_install_status = {'mtime_ns': None, 'data': {}}
+
+def read_install_progress():
+    """Installation status from the event log, or installation_status.json from an older logger"""
+    progress = install_events.read()
+    if progress or os.path.exists(INSTALL_EVENTS_FILE):
+        return progress
+    try:
+        mtime_ns = os.stat(INSTALL_STATUS_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if mtime_ns != legacy_install_status['mtime_ns']:
+        try:
+            with open(INSTALL_STATUS_FILE, 'r') as f:
+                legacy_install_status['data'] = json.load(f)
+            legacy_install_status['mtime_ns'] = mtime_ns
+        except (OSError, ValueError):
+            pass  # Mid-write; keep the previous contents
+    return legacy_install_status['data']
+
 def get_installation_status():
     """Get current installation status"""
     status = {
         'comfyui_ready': False,
         'sageattention_complete': False,
-        'log': '',
+        'log': progress_log_tail.tail_text(INSTALL_LOG_TAIL_BYTES),
         'installation_complete': False,
         'processes': {
-            'model_downloader': False,
+            'model_downloader': model_downloader_process.is_running(),
             'file_manager': True,  # This service is running
             'comfyui': False
         },
-        'progress': {}
+        'progress': {},
+        'steps': install_events.read_steps(),
+        'wheelhouse': wheelhouse_status()
     }
-    
-    # Check installation progress file
-    progress_log = "/workspace/installation_progress.log"
-    if os.path.exists(progress_log):
-        try:
-            with open(progress_log, 'r') as f:
-                status['log'] = f.read()
-        except:
-            pass
-    
-    # Check installation status JSON
-    status_file = "/workspace/installation_status.json"
-    if os.path.exists(status_file):
-        try:
-            with open(status_file, 'r') as f:
-                progress_data = json.load(f)
-                status['progress'] = progress_data
-                status['installation_complete'] = progress_data.get('overall') == 'completed'
-        except:
-            pass
-    
-    # Check if ComfyUI is ready
-    comfyui_path = "/workspace/ComfyUI/main.py"
-    if os.path.exists(comfyui_path):
-        # Check if ComfyUI process is running
-        try:
-            result = subprocess.run(['pgrep', '-f', 'python.*main.py.*--port.*8188'], 
-                                  capture_output=True, text=True)
-            status['comfyui_ready'] = result.returncode == 0
-            status['processes']['comfyui'] = result.returncode == 0
-        except:
-            pass
-    
-    # Check SageAttention installation
-    sageattention_log = "/workspace/sageattention_install.log"
-    if os.path.exists(sageattention_log):
-        try:
-            with open(sageattention_log, 'r') as f:
-                log_content = f.read()
-                status['sageattention_complete'] = "installation completed!" in log_content.lower()
-                if not status['log']:  # If no main log, use SageAttention log
-                    status['log'] = log_content
-        except:
-            pass
-    
-    # Check model downloader process
-    try:
-        result = subprocess.run(['pgrep', '-f', 'model_downloader.py'], 
-                              capture_output=True, text=True)
-        status['processes']['model_downloader'] = result.returncode == 0
-    except:
-        pass
-    
+
+    progress_data = read_install_progress()
+    if progress_data:
+        status['progress'] = progress_data
+        status['installation_complete'] = progress_data.get('overall') == 'completed'
+
+    # ComfyUI counts as ready once it is installed and its server process is up
+    if os.path.exists(COMFYUI_MAIN):
+        running = comfyui_process.is_running()
+        status['comfyui_ready'] = running
+        status['processes']['comfyui'] = running
+
+    status['sageattention_complete'] = (sageattention_log_tail.has_seen(SAGEATTENTION_DONE)
+                                        or status['progress'].get('sageattention') in ('completed', 'skipped'))
+    if not status['log']:  # If no main log, use SageAttention log
+        status['log'] = sageattention_log_tail.tail_text(INSTALL_LOG_TAIL_BYTES)
+
     return status
 
 @app.route('/installation-status')
@@ -650,8 +2936,62 @@ def installation_status():
 
 @app.route('/api/installation-status')
 def api_installation_status():
-    """API endpoint for installation status"""
-    return jsonify(get_installation_status())
+    """API endpoint for installation status (a shared snapshot at most INSTALL_STATUS_TTL old)"""
+    with install_status_lock:
+        snapshot = install_status_snapshot
+        if time.monotonic() - snapshot['time'] > INSTALL_STATUS_TTL:
+            body = json.dumps(get_installation_status())
+            if body != snapshot['body']:
+                snapshot['body'] = body
+                snapshot['etag'] = hashlib.sha1(body.encode()).hexdigest()
+            snapshot['time'] = time.monotonic()
+        body, etag = snapshot['body'], snapshot['etag']
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Unchanged since the client's last poll: 304 without resending the log
+    return response.make_conditional(request)
+
+@app.route('/api/installation-log')
+def api_installation_log():
+    """New installation log lines since byte offset `since`.
+
+    Without `since` the recent tail is returned. Pass back `next_offset` as `since` and
+    `log_id` as `id`; `reset: true` means the log was replaced and the client starts over.
+    `log` picks progress or sageattention (default: progress, else the SageAttention log).
+    """
+    log_name = request.args.get('log')
+    if log_name is None:
+        log_name = 'progress' if os.path.exists(INSTALL_PROGRESS_LOG) else 'sageattention'
+    tails = {'progress': progress_log_tail, 'sageattention': sageattention_log_tail}
+    if log_name not in tails:
+        return jsonify({'error': 'Unknown log'}), 400
+    since = request.args.get('since', type=int)
+    if since is not None and since < 0:
+        return jsonify({'error': 'Invalid offset'}), 400
+
+    result = tails[log_name].read_since(since, request.args.get('id'))
+    result['log'] = log_name
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/installation-profile')
+def api_installation_profile():
+    """Startup timeline of the current pod start (seconds since start_services.sh began).
+
+    With download=1 it is sent as a JSON file, to compare cold starts between template versions.
+    """
+    profile = install_events.read_profile()
+    profile['generated'] = datetime.now().isoformat(timespec='seconds')
+    response = jsonify(profile)
+    response.headers['Cache-Control'] = 'no-cache'
+    if request.args.get('download'):
+        version = profile['template_version'] or 'unknown'
+        name = f"startup_profile_{version}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        response.headers['Content-Disposition'] = content_disposition('attachment', name)
+    return response
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8765, debug=False)
@@ -285,7 +285,8 @@ source /workspace/comfy_template/installation_logger.sh 2>/dev/null || true
 log_step "SageAttention background installation started"
 cd /workspace/ComfyUI/SageAttention
 export EXT_PARALLEL=4 NVCC_APPEND_FLAGS="--threads 8" MAX_JOBS=32
-python setup.py install
+# Reuses a wheel built earlier for this torch/CUDA/GPU, otherwise builds and keeps one
+python /workspace/comfy_template/wheelhouse.py install sageattention .
 
 # Check if installation was successful
 if [ $? -eq 0 ]; then
@@ -323,7 +324,7 @@ EOF
       log_step "Installing SageAttention synchronously (15-20 minutes)"
       update_status "sageattention" "installing_sync"
       export EXT_PARALLEL=4 NVCC_APPEND_FLAGS="--threads 8" MAX_JOBS=32
-      python setup.py install
+      python /workspace/comfy_template/wheelhouse.py install sageattention .
       mark_installed "sageattention"
       update_status "sageattention" "completed"
     fi
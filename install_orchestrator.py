@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Install ComfyUI and its custom nodes for start_services.sh, running independent steps in parallel.
+
+The steps flux_install.sh runs one after another are declared in build_steps() with
+their dependencies. Steps whose dependencies are done run concurrently, up to --jobs at
+a time: the custom node clones, the FFmpeg and SageAttention sources and the SageAttention
+build overlap with each other and with the pip installs. pip itself runs for one step at
+a time (across processes too), since concurrent installs into one environment break each other.
+
+A step is skipped while its marker in /workspace/.install_markers is valid. Markers record
+a fingerprint of the step (what it installs and the contents of its input files, such as
+requirements.txt), so a step runs again when those change. Markers written by
+flux_install.sh hold only a date and are accepted as they are.
+
+Each step reports running/completed/failed/skipped and its duration to the installation
+event log (see installation_logger.sh), which /installation-status shows, and writes its
+output to /workspace/install_logs/<step>.log.
+
+Usage: python install_orchestrator.py [STEP ...] [--exclude STEP] [--background STEP]
+                                      [--force STEP] [--jobs N] [--list]
+  STEP ...      run only these steps and what they depend on (default: all)
+  --exclude     leave out these steps and everything that depends on them
+  --background  like --exclude, then run them in a detached process once the rest succeeded
+  --force       run these steps even if their markers are valid
+Environment: UPDATE_COMFY_UI (default true), INSTALL_JOBS (default 6)
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from installation_events import timestamp, update_status
+from wheelhouse import PIP_CACHE_DIR, ensure_wheel
+
+COMFYUI_DIR = "/workspace/ComfyUI"
+CUSTOM_NODES_DIR = os.path.join(COMFYUI_DIR, "custom_nodes")
+MARKERS_DIR = "/workspace/.install_markers"
+INSTALL_LOG_DIR = "/workspace/install_logs"
+LOG_FILE = "/workspace/installation_progress.log"
+SAGEATTENTION_LOG = "/workspace/sageattention_install.log"
+PIP_LOCK_FILE = os.path.join(MARKERS_DIR, ".pip.lock")
+COMFYUI_PROCESS_PATTERN = "python.*main.py.*--listen.*--port.*8188"
+INSTALL_JOBS = int(os.environ.get('INSTALL_JOBS', 6))
+UPDATE_COMFY_UI = os.environ.get('UPDATE_COMFY_UI', 'true') != 'false'
+FAILED_LOG_LINES = 20  # Lines of a failed step's output copied to the progress log
+
+CUSTOM_NODES_REPOS = [
+    "https://github.com/Kosinkadink/ComfyUI-VideoHelperSuite",
+    "https://github.com/civitai/civitai_comfy_nodes",
+    "https://github.com/kijai/ComfyUI-KJNodes",
+    "https://github.com/cubiq/ComfyUI_essentials",
+    "https://github.com/sipherxyz/comfyui-art-venture",
+    "https://github.com/twri/sdxl_prompt_styler",
+    "https://github.com/Nourepide/ComfyUI-Allor",
+    "https://github.com/Extraltodeus/sigmas_tools_and_the_golden_scheduler",
+    "https://github.com/rgthree/rgthree-comfy",
+    "https://github.com/pollockjj/ComfyUI-MultiGPU",
+    "https://github.com/daxcay/ComfyUI-JDCN",
+    "https://github.com/city96/ComfyUI-GGUF",
+    "https://github.com/calcuis/gguf",
+    "https://github.com/kijai/ComfyUI-WanVideoWrapper",
+    "https://github.com/Fannovel16/comfyui_controlnet_aux.git",
+    "https://github.com/kijai/ComfyUI-GIMM-VFI",
+    "https://github.com/WASasquatch/was-node-suite-comfyui.git",
+]
+# Custom nodes whose requirements.txt is installed
+NODES_WITH_REQS = [
+    "ComfyUI-GGUF",
+    "ComfyUI-JDCN",
+    "ComfyUI-KJNodes",
+    "ComfyUI-WanVideoWrapper",
+    "was-node-suite-comfyui",
+]
+ADDITIONAL_PACKAGES = [
+    ["accelerate", "einops", "transformers>=4.28.1", "safetensors>=0.4.2", "aiohttp", "pyyaml",
+     "Pillow", "scipy", "tqdm", "psutil", "tokenizers>=0.13.3"],
+    ["torchsde"],
+    ["kornia>=0.7.1", "spandrel", "soundfile", "sentencepiece"],
+    ["imageio-ffmpeg"],  # For VHS_VideoCombine node
+]
+SAGEATTENTION_BUILD_ENV = {'EXT_PARALLEL': '4', 'NVCC_APPEND_FLAGS': '--threads 8', 'MAX_JOBS': '32'}
+
+def log_step(message):
+    """Add a line to the installation log shown on the status page"""
+    line = f"[{timestamp()}] {message}\n"
+    with open(LOG_FILE, 'a') as f:
+        f.write(line)
+    print(message, flush=True)
+
+def file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+class StepContext:
+    """What a step's action runs commands through; output goes to the step's log"""
+
+    def __init__(self, step, log):
+        self.step = step
+        self.log = log
+
+    def write(self, message):
+        self.log.write(f"[{timestamp()}] {message}\n")
+        self.log.flush()
+
+    def run(self, command, cwd=None, env=None, check=True):
+        self.write('$ ' + ' '.join(command))
+        result = subprocess.run(command, cwd=cwd, env={**os.environ, **(env or {})},
+                                stdout=self.log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, command)
+        return result.returncode
+
+    def pip(self, *args):
+        """pip, holding the lock that keeps two installs out of site-packages at once"""
+        os.makedirs(MARKERS_DIR, exist_ok=True)
+        with open(PIP_LOCK_FILE, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self.run([sys.executable, '-m', 'pip', *args])
+
+class Step:
+    """One install step.
+
+    action(ctx) does the work. key describes what the step installs and inputs lists
+    files it installs from; both go into the marker's fingerprint. creates is a path
+    that must exist for a marker to count (e.g. the directory a clone made).
+    """
+
+    def __init__(self, name, action, deps=(), key='', inputs=(), creates=None, log=None):
+        self.name = name
+        self.action = action
+        self.deps = tuple(deps)
+        self.key = key
+        self.inputs = tuple(inputs)
+        self.creates = creates
+        self.log_path = log or os.path.join(INSTALL_LOG_DIR, f"{name}.log")
+
+    @property
+    def marker_path(self):
+        return os.path.join(MARKERS_DIR, f"{self.name}.done")
+
+    def fingerprint(self):
+        inputs = [[path, file_digest(path)] for path in self.inputs]
+        return hashlib.sha256(json.dumps([self.key, inputs]).encode()).hexdigest()[:16]
+
+    def is_done(self):
+        if self.creates and not os.path.exists(self.creates):
+            return False
+        try:
+            with open(self.marker_path, 'r') as f:
+                content = f.read()
+        except OSError:
+            return False
+        try:
+            marker = json.loads(content)
+        except ValueError:
+            return True  # Written by flux_install.sh (just a date)
+        if not isinstance(marker, dict):
+            return True
+        return marker.get('fingerprint') == self.fingerprint()
+
+    def mark_done(self, duration):
+        # flux_install.sh only checks that the marker exists, so it still recognizes these
+        os.makedirs(MARKERS_DIR, exist_ok=True)
+        marker = {'completed': timestamp(), 'fingerprint': self.fingerprint(), 'duration': round(duration, 1)}
+        temp_path = self.marker_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(marker, f)
+        os.replace(temp_path, self.marker_path)
+
+def git_step(name, url, dest, deps=(), update=True):
+    """Clone url into dest, or pull if it is already there"""
+    def action(ctx):
+        if not os.path.isdir(os.path.join(dest, '.git')):
+            ctx.run(['git', 'clone', url, dest])
+        elif update:
+            ctx.run(['git', 'pull'], cwd=dest)
+    return Step(name, action, deps, key=url, creates=dest)
+
+def pip_step(name, package_sets, deps=(), inputs=()):
+    """pip install each list in package_sets (a list of arguments)"""
+    def action(ctx):
+        for packages in package_sets:
+            ctx.pip('install', *packages)
+    return Step(name, action, deps, key=json.dumps(package_sets), inputs=inputs)
+
+def setup_comfyui_manager(ctx):
+    manager_dir = os.path.join(CUSTOM_NODES_DIR, 'ComfyUI-Manager')
+    requirements = os.path.join(manager_dir, 'requirements.txt')
+    if os.path.exists(requirements):
+        ctx.pip('install', '-r', requirements)
+    # Depends on ComfyUI-Manager's state/config; don't fail if it doesn't work
+    ctx.run([sys.executable, os.path.join(manager_dir, 'cm-cli.py'), 'restore-dependencies'], check=False)
+
+def install_node_requirements(ctx):
+    for node_name in NODES_WITH_REQS:
+        requirements = os.path.join(CUSTOM_NODES_DIR, node_name, 'requirements.txt')
+        if os.path.exists(requirements):
+            ctx.write(f"Installing dependencies for {node_name}...")
+            ctx.pip('install', '-r', requirements)
+
+def comfyui_running():
+    return subprocess.run(['pgrep', '-f', COMFYUI_PROCESS_PATTERN], stdout=subprocess.DEVNULL).returncode == 0
+
+def install_sageattention(ctx):
+    source = os.path.join(COMFYUI_DIR, 'SageAttention')
+    # Reused from the wheelhouse when this torch/CUDA/GPU has built this revision before. The
+    # 15-20 minute compile doesn't touch site-packages, so only the install holds the pip lock
+    wheel, hit = ensure_wheel('sageattention', source, env=SAGEATTENTION_BUILD_ENV, run=ctx.run)
+    ctx.write(f"{'Reusing' if hit else 'Built'} {wheel}")
+    ctx.pip('install', '--no-deps', '--force-reinstall', wheel)
+    # The file manager's status page looks for this line
+    ctx.write("SageAttention installation completed!")
+    if comfyui_running():
+        ctx.write("ComfyUI is running; restarting it to load SageAttention...")
+        ctx.run(['bash', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'restart_comfyui.sh')],
+                check=False)
+
+def build_steps():
+    """The steps of flux_install.sh, with the markers it uses where it has one"""
+    steps = [
+        git_step('comfyui_core', "https://github.com/comfyanonymous/ComfyUI.git", COMFYUI_DIR,
+                 update=UPDATE_COMFY_UI),
+        pip_step('dependencies_main', [['-r', os.path.join(COMFYUI_DIR, 'requirements.txt')]],
+                 deps=['comfyui_core'], inputs=[os.path.join(COMFYUI_DIR, 'requirements.txt')]),
+        pip_step('dependencies_additional', ADDITIONAL_PACKAGES, deps=['dependencies_main']),
+        pip_step('manager_prerequisites', [['GitPython', 'typer']]),
+        git_step('comfyui_manager_source', "https://github.com/ltdrdata/ComfyUI-Manager.git",
+                 os.path.join(CUSTOM_NODES_DIR, 'ComfyUI-Manager'), deps=['comfyui_core']),
+        Step('comfyui_manager', setup_comfyui_manager,
+             deps=['comfyui_manager_source', 'manager_prerequisites', 'dependencies_main'],
+             inputs=[os.path.join(CUSTOM_NODES_DIR, 'ComfyUI-Manager', 'requirements.txt')]),
+    ]
+    node_steps = []
+    for url in CUSTOM_NODES_REPOS:
+        repo_name = os.path.basename(url)
+        if repo_name.endswith('.git'):
+            repo_name = repo_name[:-len('.git')]
+        node_steps.append(git_step(f"node_{repo_name}", url, os.path.join(CUSTOM_NODES_DIR, repo_name),
+                                   deps=['comfyui_core']))
+    steps += node_steps
+    steps += [
+        Step('custom_nodes', install_node_requirements,
+             deps=[step.name for step in node_steps] + ['dependencies_additional'],
+             key=json.dumps(NODES_WITH_REQS),
+             inputs=[os.path.join(CUSTOM_NODES_DIR, name, 'requirements.txt') for name in NODES_WITH_REQS]),
+        git_step('ffmpeg_source', "https://git.ffmpeg.org/ffmpeg.git", os.path.join(COMFYUI_DIR, 'ffmpeg'),
+                 deps=['comfyui_core'], update=False),
+        pip_step('gguf_node', [['gguf-node']], deps=['dependencies_additional']),
+        git_step('sageattention_source', "https://github.com/thu-ml/SageAttention.git",
+                 os.path.join(COMFYUI_DIR, 'SageAttention'), deps=['comfyui_core']),
+        Step('sageattention', install_sageattention, deps=['sageattention_source', 'dependencies_main'],
+             key=json.dumps(SAGEATTENTION_BUILD_ENV), log=SAGEATTENTION_LOG),
+    ]
+    return {step.name: step for step in steps}
+
+def check_graph(steps):
+    """Raise ValueError for unknown dependencies or cycles"""
+    for step in steps.values():
+        for dep in step.deps:
+            if dep not in steps:
+                raise ValueError(f"{step.name} depends on unknown step {dep}")
+    visiting, visited = set(), set()
+
+    def visit(name):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {name}")
+        visiting.add(name)
+        for dep in steps[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in steps:
+        visit(name)
+
+def select_steps(steps, targets=(), exclude=()):
+    """targets and their dependencies (all steps if none), minus exclude and its dependents"""
+    selected = set()
+    pending = list(targets or steps)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(steps[name].deps)
+    excluded = set(exclude)
+    changed = True
+    while changed:
+        changed = False
+        for name in selected - excluded:
+            if excluded.intersection(steps[name].deps):
+                excluded.add(name)
+                changed = True
+    return {name: step for name, step in steps.items() if name in selected and name not in excluded}
+
+class Orchestrator:
+    """Runs a set of steps in dependency order, at most jobs at a time"""
+
+    def __init__(self, steps, jobs=INSTALL_JOBS, force=()):
+        self.steps = steps
+        self.jobs = jobs
+        self.force = set(force)
+        self.states = {}  # name -> completed/skipped/failed/blocked
+
+    def report(self, step, status, **fields):
+        update_status(step.name, status, **fields)
+
+    def run_step(self, step):
+        """Run one step; returns True when it succeeded"""
+        os.makedirs(os.path.dirname(step.log_path), exist_ok=True)
+        log_step(f"Starting {step.name}")
+        self.report(step, 'running')
+        start = time.monotonic()
+        with open(step.log_path, 'w') as log:
+            ctx = StepContext(step, log)
+            try:
+                step.action(ctx)
+                succeeded = True
+            except Exception as e:
+                ctx.write(f"Failed: {e}")
+                succeeded = False
+        duration = time.monotonic() - start
+        if succeeded:
+            step.mark_done(duration)
+            log_step(f"✓ COMPLETED: {step.name} ({duration:.1f}s)")
+            self.report(step, 'completed', duration=round(duration, 1))
+        else:
+            with open(step.log_path, 'r', errors='replace') as log:
+                tail = log.readlines()[-FAILED_LOG_LINES:]
+            log_step(f"✗ FAILED: {step.name} after {duration:.1f}s (log: {step.log_path})\n" + ''.join(tail).rstrip())
+            self.report(step, 'failed', duration=round(duration, 1), log=step.log_path)
+        return succeeded
+
+    def ready(self):
+        """Pending steps whose dependencies have all finished; blocks those behind a failure"""
+        ready = []
+        for name, step in self.steps.items():
+            if name in self.states:
+                continue
+            dep_states = [self.states.get(dep) for dep in step.deps]
+            if any(state in ('failed', 'blocked') for state in dep_states):
+                self.states[name] = 'blocked'
+                log_step(f"✗ FAILED: {name} not run, a step it depends on failed")
+                self.report(step, 'blocked')
+            elif all(state in ('completed', 'skipped') for state in dep_states):
+                ready.append(step)
+        return ready
+
+    def run(self):
+        """Run every step; returns True when none failed"""
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while True:
+                progressed = False
+                for step in self.ready():
+                    if step.name in running.values():
+                        continue
+                    if step.name not in self.force and step.is_done():
+                        self.states[step.name] = 'skipped'
+                        self.report(step, 'skipped')
+                        progressed = True  # May have made its dependents ready
+                    else:
+                        running[executor.submit(self.run_step, step)] = step.name
+                if progressed:
+                    continue
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.states[name] = 'completed' if future.result() else 'failed'
+        return not any(state in ('failed', 'blocked') for state in self.states.values())
+
+def start_background(names):
+    """Run the orchestrator for names in a detached process that outlives this one"""
+    command = [sys.executable, os.path.abspath(__file__), *names]
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    log_step(f"Continuing {', '.join(names)} in the background")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*', metavar='STEP', help='steps to run (default: all)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='STEP')
+    parser.add_argument('--background', action='append', default=[], metavar='STEP')
+    parser.add_argument('--force', action='append', default=[], metavar='STEP')
+    parser.add_argument('--jobs', type=int, default=INSTALL_JOBS, help='steps run at once')
+    parser.add_argument('--list', action='store_true', help='show the steps and whether they are done')
+    args = parser.parse_args()
+
+    steps = build_steps()
+    check_graph(steps)
+    for name in args.targets + args.exclude + args.background + args.force:
+        if name not in steps:
+            parser.error(f"unknown step {name} (see --list)")
+    selected = select_steps(steps, args.targets, args.exclude + args.background)
+
+    if args.list:
+        for name, step in selected.items():
+            state = 'done' if step.is_done() else 'to do'
+            print(f"{name:<40} {state:<6} {', '.join(step.deps)}")
+        return
+
+    # Downloaded and built wheels survive the pod on the volume
+    os.environ.setdefault('PIP_CACHE_DIR', PIP_CACHE_DIR)
+    # A run of everything drives the overall status the status page shows
+    full_run = not args.targets
+    os.makedirs(MARKERS_DIR, exist_ok=True)
+    if full_run:
+        log_step("Starting ComfyUI installation and setup")
+        update_status('overall', 'starting')
+    start = time.monotonic()
+    succeeded = Orchestrator(selected, args.jobs, args.force).run()
+    elapsed = time.monotonic() - start
+
+    if not succeeded:
+        log_step(f"✗ FAILED: installation ({elapsed:.1f}s)")
+        if full_run:
+            update_status('overall', 'failed')
+        sys.exit(1)
+    if args.background:
+        start_background(sorted(set(args.background) - set(args.exclude)))
+    if full_run:
+        with open(os.path.join(MARKERS_DIR, 'overall_installation.done'), 'w') as f:
+            f.write(timestamp() + '\n')
+        update_status('overall', 'completed')
+        log_step(f"Installation finished in {elapsed:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -25,8 +25,19 @@ export MAX_JOBS=32
 echo "Installing SageAttention with optimization flags..."
 echo "This will run in background. You can use model downloader now!"
 
-# Install in background
-nohup python setup.py install > /workspace/sageattention_install.log 2>&1 &
+# Install in background; a wheel built earlier for this torch/CUDA/GPU is reused from
+# /workspace/.wheelhouse, otherwise it is built once and kept there. The install runs in
+# the foreground of one background subshell, which then writes the completion marker.
+nohup bash -c '
+    if python /workspace/comfy_template/wheelhouse.py install sageattention .; then
+        mkdir -p /workspace/.install_markers
+        date "+%Y-%m-%d %H:%M:%S" > /workspace/.install_markers/sageattention.done
+        echo "$(date): SageAttention installation completed successfully!"
+    else
+        echo "$(date): SageAttention installation failed!"
+        exit 1
+    fi
+' > /workspace/sageattention_install.log 2>&1 &
 
 # Get the process ID
 SAGE_PID=$!
@@ -34,15 +45,4 @@ echo "SageAttention installation started with PID: $SAGE_PID"
 echo "Monitor progress: tail -f /workspace/sageattention_install.log"
 echo "Check if running: ps aux | grep $SAGE_PID"
 
-# Create completion marker when done
-(
-    wait $SAGE_PID
-    if [ $? -eq 0 ]; then
-        echo "$(date '+%Y-%m-%d %H:%M:%S')" > /workspace/.install_markers/sageattention.done
-        echo "$(date): SageAttention installation completed successfully!" >> /workspace/sageattention_install.log
-    else
-        echo "$(date): SageAttention installation failed!" >> /workspace/sageattention_install.log
-    fi
-) &
-
 echo "=== You can now use the model downloader while SageAttention compiles! ==="
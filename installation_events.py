@@ -0,0 +1,45 @@
+"""
+Append events to the installation event log from Python (installation_logger.sh does it from bash).
+
+Each event is one JSON line written with a single write() to a file opened with O_APPEND,
+so writers in different processes never interleave. Every event carries:
+  ts    wall-clock time (epoch seconds)
+  time  the same, formatted for people
+  mono  seconds since the machine booted, from /proc/uptime like the bash logger, so
+        phases timed by different processes line up on one clock
+The file manager folds the events into the status and the startup timeline on /installation-status.
+"""
+import json
+import os
+import time
+
+EVENTS_FILE = "/workspace/installation_events.jsonl"
+
+def timestamp():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+def boot_clock():
+    """Seconds since boot (the clock installation_logger.sh reads)"""
+    try:
+        with open('/proc/uptime', 'r') as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return round(time.monotonic(), 2)
+
+def emit_event(event, **fields):
+    """Append one event; progress reporting never stops the caller, so errors are ignored"""
+    record = {'ts': round(time.time(), 6), 'time': timestamp(), 'mono': boot_clock(), 'pid': os.getpid(),
+              'event': event, **fields}
+    line = (json.dumps(record, ensure_ascii=False) + '\n').encode()
+    try:
+        fd = os.open(EVENTS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    except OSError:
+        return  # No /workspace, e.g. a service started outside the pod
+    try:
+        os.write(fd, line)  # One write on an O_APPEND descriptor: never interleaved
+    finally:
+        os.close(fd)
+
+def update_status(component, status, **fields):
+    """Python equivalent of installation_logger.sh's update_status"""
+    emit_event('status', component=component, status=status, **fields)
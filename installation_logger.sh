@@ -2,61 +2,104 @@
 
 # Installation progress logger
 # This script helps track installation progress for the status page
+#
+# Progress is reported as events appended to $EVENTS_FILE, one JSON object per line:
+#   {"ts": 1718000000.123456, "time": "2024-06-10 12:00:00", "mono": 83.51, "pid": 42,
+#    "event": "status", "component": "pytorch", "status": "installing"}
+# mono is seconds since boot (/proc/uptime), the clock installation_events.py uses too, so
+# phases timed by different scripts and services line up on the startup timeline.
+# Each event is written with a single write() to a file opened with O_APPEND (bash's >>),
+# so install scripts running at the same time never overwrite each other's updates, and
+# no Python interpreter is started per update. The file manager folds the events into
+# the status shown on /installation-status.
 
 LOG_FILE="/workspace/installation_progress.log"
-TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')
+EVENTS_FILE="/workspace/installation_events.jsonl"
+
+# Set TIMESTAMP to the current time (a bash builtin, no date process)
+_set_timestamp() {
+    printf -v TIMESTAMP '%(%Y-%m-%d %H:%M:%S)T' -1
+}
+
+# Set the variable named $2 to $1 as a JSON string
+_json_string() {
+    local s=${1//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\n'/\\n}
+    s=${s//$'\r'/\\r}
+    s=${s//$'\t'/\\t}
+    printf -v "$2" '"%s"' "$s"
+}
+
+# Append an event: emit_event <event> [<key> <value>]...
+emit_event() {
+    local event="$1" line key value
+    shift
+    _set_timestamp
+    _json_string "$event" value
+    local ts=${EPOCHREALTIME:-$(printf '%(%s)T' -1)} mono
+    read -r mono _ < /proc/uptime 2>/dev/null || mono=null
+    line="{\"ts\": ${ts/,/.}, \"time\": \"$TIMESTAMP\", \"mono\": $mono, \"pid\": $$, \"event\": $value"
+    while [ $# -ge 2 ]; do
+        _json_string "$1" key
+        _json_string "$2" value
+        line+=", $key: $value"
+        shift 2
+    done
+    # One line, one write: appends from concurrent scripts never interleave
+    printf '%s}\n' "$line" >> "$EVENTS_FILE"
+}
 
 # Function to log with timestamp
 log_step() {
+    _set_timestamp
     echo "[$TIMESTAMP] $1" >> "$LOG_FILE"
     echo "$1"
 }
 
 # Function to mark step as completed
 mark_completed() {
+    _set_timestamp
     echo "[$TIMESTAMP] ✓ COMPLETED: $1" >> "$LOG_FILE"
+    emit_event step step "$1" status completed
     echo "✓ $1"
 }
 
 # Function to mark step as failed
 mark_failed() {
+    _set_timestamp
     echo "[$TIMESTAMP] ✗ FAILED: $1" >> "$LOG_FILE"
+    emit_event step step "$1" status failed
     echo "✗ $1"
 }
 
 # Function to update overall status
 update_status() {
-    local component="$1"
-    local status="$2"
-    local status_file="/workspace/installation_status.json"
-    
-    # Create or update status file
-    if [ ! -f "$status_file" ]; then
-        echo '{}' > "$status_file"
-    fi
-    
-    # Update component status
-    python3 -c "
-import json
-import sys
-
-try:
-    with open('$status_file', 'r') as f:
-        status = json.load(f)
-except:
-    status = {}
-
-status['$component'] = '$status'
-status['last_updated'] = '$TIMESTAMP'
-
-with open('$status_file', 'w') as f:
-    json.dump(status, f, indent=2)
-"
+    emit_event status component "$1" status "$2"
+}
+
+# Mark phase <name> completed once something answers on <port>, or failed after <timeout> seconds:
+# wait_for_port <name> <port> [timeout]. Run it in the background (&) to keep going meanwhile.
+wait_for_port() {
+    local name="$1" port="$2" timeout="${3:-900}" start=$SECONDS
+    while ! (exec 3<>"/dev/tcp/127.0.0.1/$port") 2>/dev/null; do
+        if [ $((SECONDS - start)) -ge "$timeout" ]; then
+            update_status "$name" "failed"
+            return 1
+        fi
+        sleep 0.5
+    done
+    update_status "$name" "completed"
 }
 
 # Export functions for use in other scripts
+export -f _set_timestamp
+export -f _json_string
+export -f emit_event
 export -f log_step
-export -f mark_completed  
+export -f mark_completed
 export -f mark_failed
 export -f update_status
+export -f wait_for_port
 export LOG_FILE
+export EVENTS_FILE
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Load-test the running file manager and model downloader with concurrent clients.
+
+Each client thread loops over one kind of request until --duration runs out:
+  - browse:    file manager /api/browse for --path (one 500-item page)
+  - status:    model downloader /status
+  - download:  file manager /api/download of --file, read to the end
+  - slow:      the same download read at --slow-rate KB/s, like a client on a bad link,
+               to check that slow clients don't hold up everyone else
+
+Reports requests/s, latency percentiles and errors per kind. Start the services first,
+e.g. `python serve.py file_manager` and `python serve.py model_downloader`, or the
+development servers (`python file_manager.py`) to compare.
+
+Usage: python load_test.py --path /workspace/ComfyUI/output --file /workspace/some.safetensors
+                           [--clients browse=8,status=8,download=2,slow=4] [--duration 30]
+"""
+import argparse
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+
+def parse_clients(spec):
+    clients = {}
+    for part in spec.split(','):
+        kind, _, count = part.partition('=')
+        clients[kind.strip()] = int(count)
+    return clients
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--file-manager', default='http://127.0.0.1:8765', help='file manager base URL')
+    parser.add_argument('--downloader', default='http://127.0.0.1:8866', help='model downloader base URL')
+    parser.add_argument('--path', default='/workspace', help='folder to browse')
+    parser.add_argument('--file', help='file to download (download/slow clients are skipped without it)')
+    parser.add_argument('--clients', default='browse=8,status=8,download=2,slow=4',
+                        help='client threads per request kind')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--slow-rate', type=int, default=64, help='read rate of slow clients in KB/s')
+    args = parser.parse_args()
+
+    requests_by_kind = {
+        'browse': (f'{args.file_manager}/api/browse', {'path': args.path, 'limit': 500}),
+        'status': (f'{args.downloader}/status', {}),
+        'download': (f'{args.file_manager}/api/download', {'path': args.file}),
+        'slow': (f'{args.file_manager}/api/download', {'path': args.file}),
+    }
+    clients = parse_clients(args.clients)
+    for kind in clients:
+        if kind not in requests_by_kind:
+            parser.error(f'unknown client kind {kind}')
+    if not args.file:
+        clients.pop('download', None)
+        clients.pop('slow', None)
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    transferred = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client(kind):
+        url, params = requests_by_kind[kind]
+        session = requests.Session()  # Keep-alive, like a browser tab
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            received = 0
+            try:
+                with session.get(url, params=params, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    if kind == 'slow':
+                        chunk_size = args.slow_rate * 1024 // 10
+                        for chunk in response.iter_content(chunk_size):
+                            received += len(chunk)
+                            if time.monotonic() >= deadline:
+                                break
+                            time.sleep(0.1)
+                    else:
+                        for chunk in response.iter_content(1024 * 1024):
+                            received += len(chunk)
+            except requests.RequestException:
+                with lock:
+                    errors[kind] += 1
+                time.sleep(0.5)
+                continue
+            with lock:
+                latencies[kind].append(time.perf_counter() - start)
+                transferred[kind] += received
+
+    threads = [threading.Thread(target=client, args=(kind,), daemon=True)
+               for kind, count in clients.items() for _ in range(count)]
+    print(f"Running {len(threads)} clients for {args.duration:.0f}s: "
+          + ', '.join(f'{kind}={count}' for kind, count in clients.items()))
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()) + 60)
+    elapsed = time.monotonic() - started
+
+    print(f"{'kind':<10} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'MB/s':>8} {'errors':>7}")
+    for kind in clients:
+        values = latencies[kind]
+        if not values:
+            print(f"{kind:<10} {'-':>8} {'-':>9} {'-':>9} {'-':>9} {'-':>8} {errors[kind]:>7}")
+            continue
+        print(f"{kind:<10} {len(values) / elapsed:>8.1f} {statistics.median(values) * 1000:>9.1f} "
+              f"{percentile(values, 0.95) * 1000:>9.1f} {max(values) * 1000:>9.1f} "
+              f"{transferred[kind] / elapsed / 1024 / 1024:>8.1f} {errors[kind]:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import os
 import requests
 from pathlib import Path
@@ -6,6 +6,10 @@ import threading
 import json
 import time
 import fcntl
+import hashlib
+import heapq
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 app = Flask(__name__)
@@ -16,6 +20,41 @@ MODELS_BASE_DIR = "/workspace/ComfyUI/models"
 # Persistent download status file
 DOWNLOAD_STATUS_FILE = "/workspace/.download_status.json"
 
+# Segmented download settings (parallel HTTP range requests per file)
+DOWNLOAD_SEGMENTS = int(os.environ.get('DOWNLOAD_SEGMENTS', 8))
+MIN_SEGMENT_SIZE = 32 * 1024 * 1024  # Don't split files into ranges smaller than 32MB
+# Each connection reads into one reused buffer of this size
+DOWNLOAD_BUFFER_SIZE = int(os.environ.get('DOWNLOAD_BUFFER_MB', 8)) * 1024 * 1024
+PROGRESS_INTERVAL = 1.0  # Seconds between download_status progress updates
+
+# Cache of SHA-256 digests keyed by path, size and mtime (makes re-verification instant)
+HASH_CACHE_FILE = "/workspace/.hash_cache.json"
+VERIFY_WORKERS = int(os.environ.get('VERIFY_WORKERS', 4))
+
+# Content-addressed model store: blobs/<sha256> plus a url -> sha256 index.
+# Files under MODELS_BASE_DIR are hardlinks (or symlinks) to these blobs.
+BLOB_STORE_DIR = "/workspace/.model_store"
+BLOB_INDEX_FILE = os.path.join(BLOB_STORE_DIR, 'url_index.json')
+
+# Download scheduler settings
+MAX_CONCURRENT_DOWNLOADS = int(os.environ.get('MAX_CONCURRENT_DOWNLOADS', 3))
+# Lower numbers download first: small VAEs and text encoders let ComfyUI load sooner
+PATH_PRIORITIES = [
+    (('vae/', 'vae_approx/'), 0),
+    (('text_encoders/', 'clip/', 'clip_vision/'), 1),
+    (('lora/', 'loras/'), 2),
+]
+DEFAULT_PRIORITY = 3
+
+# Bandwidth shaping in MB/s (0 = unlimited); both are adjustable at runtime via /bandwidth
+DOWNLOAD_RATE_LIMIT = float(os.environ.get('DOWNLOAD_RATE_LIMIT_MB', 0)) * 1024 * 1024
+# Shared rate for "background" downloads while file_manager.py serves a transfer (0 = pause them)
+BACKGROUND_YIELD_RATE = float(os.environ.get('BACKGROUND_YIELD_MB', 1)) * 1024 * 1024
+# file_manager.py touches this file while uploads/downloads are in flight
+INTERACTIVE_TRANSFER_MARKER = "/workspace/.interactive_transfer"
+INTERACTIVE_TRANSFER_TIMEOUT = 5  # Seconds after the last touch that a transfer counts as active
+RATE_LIMIT_SLICE = 0.25  # Seconds of bandwidth granted per read while limited
+
 # Default model configurations (used only if model_configs.json doesn't exist)
 DEFAULT_MODEL_CONFIGS = {
   "flux": {
@@ -304,6 +343,26 @@ DEFAULT_MODEL_CONFIGS = {
 download_status = {}
 download_lock = threading.Lock()
 
+# Status persistence is batched: changes bump status_version and a background
+# thread writes the file at most every STATUS_FLUSH_INTERVAL seconds
+STATUS_FLUSH_INTERVAL = float(os.environ.get('STATUS_FLUSH_INTERVAL', 2))
+TERMINAL_STATUSES = ('completed', 'error')
+status_version = 0
+status_written_version = 0
+status_write_lock = threading.Lock()
+
+# Change tracking for /status/stream: which entries changed (or were removed) at which version
+status_changed = threading.Condition(download_lock)
+entry_versions = {}
+removed_versions = {}
+STREAM_KEEPALIVE = 15  # Seconds between keep-alive comments on idle streams
+STREAM_MIN_INTERVAL = 0.5  # Coalesce changes into at most one event per interval
+# Each open stream holds a server thread for as long as it lasts; past this many, clients poll /status
+MAX_STATUS_STREAMS = int(os.environ.get('MAX_STATUS_STREAMS', 4))
+status_stream_slots = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+SHUTDOWN_TIMEOUT = 10  # Seconds to wait for active downloads to checkpoint on shutdown
+server_stopping = threading.Event()  # Set by shutdown_downloads(); ends event streams
+
 def load_download_status():
     """Load download status from persistent storage"""
     global download_status
@@ -317,6 +376,9 @@ def load_download_status():
                     if status.get('status') in ['completed', 'error']:
                         if current_time - status.get('timestamp', 0) > 86400:  # 24 hours
                             del loaded_status[dest]
+                    elif status.get('status') in ['starting', 'downloading']:
+                        # The process that owned this download is gone (pod stopped/restarted)
+                        status['status'] = 'interrupted'
                 download_status = loaded_status
                 print(f"Loaded {len(download_status)} download status entries")
     except Exception as e:
@@ -324,23 +386,63 @@ def load_download_status():
         download_status = {}
 
 def save_download_status():
-    """Save download status to persistent storage"""
-    try:
-        with open(DOWNLOAD_STATUS_FILE, 'w') as f:
-            json.dump(download_status, f, indent=2)
-    except Exception as e:
-        print(f"Error saving download status: {e}")
+    """Atomically write the current download status to persistent storage"""
+    global status_written_version
+    with download_lock:
+        version = status_version
+        data = json.dumps(download_status)
+    
+    # Serialize under download_lock, but do the slow file I/O outside it
+    with status_write_lock:
+        if version <= status_written_version:
+            return  # A newer snapshot has already been written
+        try:
+            temp_file = DOWNLOAD_STATUS_FILE + '.tmp'
+            with open(temp_file, 'w') as f:
+                f.write(data)
+            os.replace(temp_file, DOWNLOAD_STATUS_FILE)
+            status_written_version = version
+        except Exception as e:
+            print(f"Error saving download status: {e}")
+
+def mark_status_changed(destinations=(), removed=()):
+    """Record in-memory changes for the flusher and stream clients (caller holds download_lock)"""
+    global status_version
+    status_version += 1
+    for dest in destinations:
+        entry_versions[dest] = status_version
+        removed_versions.pop(dest, None)
+    for dest in removed:
+        removed_versions[dest] = status_version
+        entry_versions.pop(dest, None)
+    status_changed.notify_all()
+
+def status_flusher():
+    """Background thread that coalesces status changes into one write per interval"""
+    while True:
+        time.sleep(STATUS_FLUSH_INTERVAL)
+        if status_version > status_written_version:
+            save_download_status()
+
+def start_status_flusher():
+    """Start the background status flusher and flush pending changes on exit"""
+    thread = threading.Thread(target=status_flusher, name='status-flusher')
+    thread.daemon = True
+    thread.start()
+    atexit.register(save_download_status)
 
 def update_download_status(destination, status_update):
-    """Thread-safe update of download status with persistence"""
+    """Thread-safe update of download status; persisted by the flusher thread"""
     with download_lock:
         if destination not in download_status:
             download_status[destination] = {}
         
         download_status[destination].update(status_update)
         download_status[destination]['timestamp'] = time.time()
-        
-        # Save to disk every update
+        mark_status_changed([destination])
+    
+    # Terminal state changes are written immediately instead of waiting for the flusher
+    if status_update.get('status') in TERMINAL_STATUSES:
         save_download_status()
 
 def cleanup_stale_downloads():
@@ -356,95 +458,955 @@ def cleanup_stale_downloads():
                     to_remove.append(dest)
         
         for dest in to_remove:
+            # The .part file is kept, so re-requesting the model resumes it
             download_status[dest]['status'] = 'error'
             download_status[dest]['error'] = 'Download appears to have stalled'
             print(f"Marked stale download as error: {dest}")
         
         if to_remove:
-            save_download_status()
+            mark_status_changed(to_remove)
+    
+    if to_remove:
+        save_download_status()
 
 # Load existing download status on startup
 load_download_status()
 cleanup_stale_downloads()
+start_status_flusher()
 
 # Configuration file path
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'model_configs.json')
 
-def download_file(url, destination):
+class DownloadStopped(Exception):
+    """Raised inside a download that was paused or cancelled"""
+
+class DownloadProgress:
+    """Thread-safe byte counter shared by all connections of one download.
+
+    Writers only bump counters; a timer thread turns them into download_status
+    updates every PROGRESS_INTERVAL seconds.
+    """
+
+    def __init__(self, destination, total_size, downloaded=0, ranges=None):
+        self.destination = destination
+        self.total_size = total_size
+        self.downloaded = downloaded
+        # Per-segment [start, end, next_offset] so an interrupted download can resume
+        self.ranges = ranges
+        self.resumed_from = downloaded
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.reporter = None
+        self.hasher = None
+        self.throttle = None
+
+    def add(self, nbytes, segment=None):
+        """Account for received bytes"""
+        with self.lock:
+            self.downloaded += nbytes
+            if segment is not None:
+                self.ranges[segment][2] += nbytes
+
+    def start(self):
+        self.reporter = threading.Thread(target=self._report_loop)
+        self.reporter.daemon = True
+        self.reporter.start()
+
+    def stop(self):
+        """Stop the timer and publish the final byte counts"""
+        self.stopped.set()
+        if self.reporter is not None:
+            self.reporter.join()
+        self.report()
+
+    def _report_loop(self):
+        while not self.stopped.wait(PROGRESS_INTERVAL):
+            self.report()
+
+    def report(self):
+        with self.lock:
+            downloaded = self.downloaded
+            ranges = [list(r) for r in self.ranges] if self.ranges is not None else None
+
+        elapsed_time = time.time() - self.start_time
+        speed = (downloaded - self.resumed_from) / elapsed_time if elapsed_time > 0 else 0
+        eta = (self.total_size - downloaded) / speed if speed > 0 and self.total_size > 0 else 0
+        status_update = {
+            'progress': int((downloaded / self.total_size) * 100) if self.total_size > 0 else 0,
+            'status': 'downloading',
+            'downloaded': downloaded,
+            'speed': speed,
+            'eta': eta
+        }
+        if ranges is not None:
+            status_update['ranges'] = ranges
+        update_download_status(self.destination, status_update)
+
+class TokenBucket:
+    """Byte-rate limiter shared by every connection that draws from it; rate 0 means unlimited.
+
+    Callers take a slice of bytes up front and sleep off any debt, so concurrent
+    readers are serialised at the configured rate without a dedicated thread.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = max(0, rate)
+            self.tokens = min(self.tokens, self.rate)
+
+    def slice_size(self):
+        """Largest read that should be granted at once"""
+        return max(64 * 1024, int(self.rate * RATE_LIMIT_SLICE))
+
+    def take(self, nbytes):
+        """Take nbytes from the bucket; returns how long to wait before using them"""
+        with self.lock:
+            if not self.rate:
+                return 0
+            now = time.monotonic()
+            # Allow at most one second of burst after an idle period
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate) - nbytes
+            self.updated = now
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+# Limit across all downloads, and the shared limit for background downloads while yielding
+global_bandwidth = TokenBucket(DOWNLOAD_RATE_LIMIT)
+background_bandwidth = TokenBucket(BACKGROUND_YIELD_RATE)
+
+def interactive_transfer_active():
+    """Whether file_manager.py reported an upload or download within the last few seconds"""
     try:
-        # Initialize download status
-        update_download_status(destination, {
-            'progress': 0,
-            'status': 'starting',
-            'url': url,
-            'start_time': time.time(),
-            'file_size': 0,
-            'downloaded': 0
-        })
-        
-        response = requests.get(url, stream=True)
+        return time.time() - os.path.getmtime(INTERACTIVE_TRANSFER_MARKER) < INTERACTIVE_TRANSFER_TIMEOUT
+    except OSError:
+        return False
+
+class DownloadThrottle:
+    """Rate limits for one download: the global limit, its own cap and background yielding"""
+
+    def __init__(self, rate_limit=0, background=False):
+        self.bucket = TokenBucket(rate_limit or 0)
+        self.background = background
+
+    def acquire(self, nbytes, abort=None):
+        """Wait until nbytes (or a smaller slice) may be read; returns the granted size"""
+        buckets = [global_bandwidth, self.bucket]
+        if self.background:
+            while background_bandwidth.rate == 0 and interactive_transfer_active():
+                # Yield completely until the interactive transfer is over
+                if wait_or_abort(abort, 1):
+                    return nbytes
+            if interactive_transfer_active():
+                buckets.append(background_bandwidth)
+        buckets = [bucket for bucket in buckets if bucket.rate]
+        if not buckets:
+            return nbytes
+
+        nbytes = min([nbytes] + [bucket.slice_size() for bucket in buckets])
+        wait = max(bucket.take(nbytes) for bucket in buckets)
+        if wait > 0:
+            wait_or_abort(abort, wait)
+        return nbytes
+
+def wait_or_abort(abort, seconds):
+    """Sleep, waking early if the abort event is set; returns whether it was set"""
+    if abort is None:
+        time.sleep(seconds)
+        return False
+    return abort.wait(seconds)
+
+def get_part_path(destination):
+    """Path of the in-progress file for a download destination"""
+    return destination + '.part'
+
+def probe_download(url):
+    """Return (final_url, total_size, supports_ranges, etag) for a download URL"""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"HEAD request failed for {url}, using single stream: {e}")
+        return url, 0, False, None
+
+    total_size = int(response.headers.get('content-length', 0))
+    supports_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    return response.url, total_size, supports_ranges, response.headers.get('etag')
+
+def split_ranges(total_size, segments):
+    """Split total_size bytes into [start, end, next_offset] ranges (end inclusive)"""
+    segment_size = max(MIN_SEGMENT_SIZE, -(-total_size // segments))
+    return [[start, min(start + segment_size, total_size) - 1, start]
+            for start in range(0, total_size, segment_size)]
+
+def get_resume_state(previous, destination, url, total_size, etag):
+    """Return the previous attempt's status if its .part file can be resumed"""
+    if not os.path.exists(get_part_path(destination)):
+        return None
+    if previous.get('url') != url or previous.get('file_size') != total_size or total_size <= 0:
+        return None
+    if etag and previous.get('etag') and previous.get('etag') != etag:
+        return None
+    return previous
+
+class StreamingHasher:
+    """SHA-256 of a .part file computed while it downloads.
+
+    Bytes written at the current hash offset are hashed straight from the
+    download buffer. Bytes that arrived ahead of it (other segments, or a
+    resumed prefix) are read back from the page cache once the hashed prefix
+    reaches them, so no separate pass over the finished file is needed.
+    """
+
+    def __init__(self, fd, progress):
+        self.fd = fd
+        self.progress = progress
+        self.sha256 = hashlib.sha256()
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def update(self, offset, data):
+        """Called after data has been written at offset"""
+        if not self.lock.acquire(blocking=False):
+            return  # Another thread is hashing; it will read this data back from disk
+        try:
+            if offset == self.offset:
+                self.sha256.update(data)
+                self.offset += len(data)
+            self._catch_up()
+        finally:
+            self.lock.release()
+
+    def finish(self):
+        """Hash any remaining written bytes and return the hex digest"""
+        with self.lock:
+            self._catch_up()
+            return self.sha256.hexdigest()
+
+    def _written_until(self):
+        """End of the contiguous written region starting at the hash offset"""
+        offset = self.offset
+        if self.progress.ranges is None:
+            return offset
+        with self.progress.lock:
+            for start, _, next_offset in self.progress.ranges:
+                if start <= offset < next_offset:
+                    offset = next_offset
+        return offset
+
+    def _catch_up(self):
+        end = self._written_until()
+        while self.offset < end:
+            data = os.pread(self.fd, min(DOWNLOAD_BUFFER_SIZE, end - self.offset), self.offset)
+            if not data:
+                break
+            self.sha256.update(data)
+            self.offset += len(data)
+
+def preallocate(fd, size):
+    """Reserve disk space for a download so parallel writes don't fragment the file"""
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        # Not supported on this platform/filesystem (e.g. some network volumes)
+        os.ftruncate(fd, size)
+
+def get_body_reader(response):
+    """Return a readinto() callable for a streamed response body"""
+    if response.headers.get('content-encoding', 'identity') != 'identity':
+        response.raw.decode_content = True
+        return response.raw.readinto
+    # http.client fills our buffer directly; urllib3's readinto copies through read()
+    fp = getattr(response.raw, '_fp', None)
+    return fp.readinto if fp is not None else response.raw.readinto
+
+def stream_to_fd(response, fd, offset, progress, segment=None, abort=None):
+    """Copy a response body into fd at offset using one reused buffer; returns the end offset"""
+    readinto = get_body_reader(response)
+    buffer = bytearray(DOWNLOAD_BUFFER_SIZE)
+    view = memoryview(buffer)
+
+    while True:
+        limit = len(buffer)
+        if progress.throttle is not None:
+            limit = progress.throttle.acquire(limit, abort)
+        filled = 0
+        while filled < limit:
+            if abort is not None and abort.is_set():
+                break
+            received = readinto(view[filled:limit])
+            if not received:
+                break
+            filled += received
+        if not filled:
+            break
+
+        written = 0
+        while written < filled:
+            written += os.pwrite(fd, view[written:filled], offset + written)
+        progress.add(filled, segment)
+        if progress.hasher is not None:
+            progress.hasher.update(offset, view[:filled])
+        offset += filled
+
+        if filled < limit:
+            break  # End of body (or stopped)
+    return offset
+
+def fetch_range(url, fd, segment, progress, abort):
+    """Download the remaining bytes of one segment and pwrite them into fd"""
+    start, end, offset = progress.ranges[segment]
+    if offset > end:
+        return
+
+    headers = {'Range': f'bytes={offset}-{end}'}
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise IOError(f"Server ignored range request (HTTP {response.status_code})")
+        offset = stream_to_fd(response, fd, offset, progress, segment, abort)
+
+    if offset != end + 1 and not abort.is_set():
+        raise IOError(f"Range {start}-{end} ended early at byte {offset}")
+
+def download_segmented(url, destination, total_size, resume_state, stop_event=None, throttle=None):
+    """Download using parallel range requests into a preallocated .part file"""
+    ranges = None
+    if resume_state and resume_state.get('ranges'):
+        ranges = [list(r) for r in resume_state['ranges']]
+    if not ranges:
+        ranges = split_ranges(total_size, DOWNLOAD_SEGMENTS)
+
+    downloaded = sum(offset - start for start, _, offset in ranges)
+    if downloaded:
+        print(f"Resuming {destination} at {downloaded}/{total_size} bytes")
+    progress = DownloadProgress(destination, total_size, downloaded, ranges)
+    progress.throttle = throttle
+    # Pausing/cancelling sets the same event the workers watch for errors
+    abort = stop_event if stop_event is not None else threading.Event()
+
+    fd = os.open(get_part_path(destination), os.O_RDWR | os.O_CREAT, 0o644)
+    progress.hasher = StreamingHasher(fd, progress)
+    progress.start()
+    try:
+        preallocate(fd, total_size)
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(fetch_range, url, fd, segment, progress, abort)
+                       for segment in range(len(ranges))]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                abort.set()
+                raise
+        sha256 = None if abort.is_set() else progress.hasher.finish()
+    finally:
+        os.close(fd)
+        # Persist exact segment offsets so the next attempt resumes where this one stopped
+        progress.stop()
+
+    if abort.is_set():
+        raise DownloadStopped(destination)
+    return progress.downloaded, sha256
+
+def download_single_stream(url, destination, resume_state, stop_event=None, throttle=None):
+    """Download over one connection, continuing a previous .part file when possible"""
+    ranges = resume_state.get('ranges') if resume_state else None
+    offset = ranges[0][2] if ranges and len(ranges) == 1 else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
         response.raise_for_status()
-        total_size = int(response.headers.get('content-length', 0))
+        if offset and response.status_code != 206:
+            print(f"Server does not support resume for {destination}, restarting from 0")
+            offset = 0
+        content_length = int(response.headers.get('content-length', 0))
+        total_size = offset + content_length if content_length else 0
+        update_download_status(destination, {'file_size': total_size})
+
+        # A known size is tracked as one range so the offset is persisted for resume
+        ranges = [[0, total_size - 1, offset]] if total_size else None
+        progress = DownloadProgress(destination, total_size, offset, ranges)
+        progress.throttle = throttle
+        fd = os.open(get_part_path(destination), os.O_RDWR | os.O_CREAT, 0o644)
+        progress.hasher = StreamingHasher(fd, progress)
+        progress.start()
+        try:
+            if not offset:
+                os.ftruncate(fd, 0)
+            if total_size:
+                preallocate(fd, total_size)
+            end = stream_to_fd(response, fd, offset, progress, 0 if ranges else None, stop_event)
+            sha256 = progress.hasher.finish()
+        finally:
+            os.close(fd)
+            progress.stop()
+
+    if stop_event is not None and stop_event.is_set():
+        raise DownloadStopped(destination)
+    if total_size and end != total_size:
+        raise IOError(f"Download ended early at byte {end} of {total_size}")
+    return progress.downloaded, sha256
+
+def download_file(url, destination, stop_event=None, expected_sha256=None, expected_size=None, throttle=None):
+    try:
+        previous = dict(download_status.get(destination, {}))
+        update_download_status(destination, {'status': 'starting'})
+        
+        final_url, total_size, supports_ranges, etag = probe_download(url)
+        resume_state = get_resume_state(previous, destination, url, total_size, etag)
+        use_segments = supports_ranges and DOWNLOAD_SEGMENTS > 1 and total_size >= 2 * MIN_SEGMENT_SIZE
+        
+        if resume_state is None and os.path.exists(get_part_path(destination)):
+            os.remove(get_part_path(destination))
+        
+        if expected_size and total_size and total_size != expected_size:
+            raise IOError(f"Server reports {total_size} bytes, expected {expected_size}")
         
-        # Update with file size info
+        # Initialize download status
         update_download_status(destination, {
+            'progress': resume_state.get('progress', 0) if resume_state else 0,
             'status': 'downloading',
-            'file_size': total_size
+            'url': url,
+            'etag': etag,
+            'start_time': time.time(),
+            'file_size': total_size,
+            'downloaded': resume_state.get('downloaded', 0) if resume_state else 0,
+            'error': None
         })
         
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(destination), exist_ok=True)
         
-        block_size = 8192  # 8KB blocks for better performance
-        downloaded = 0
-        start_time = time.time()
+        if use_segments:
+            downloaded, sha256 = download_segmented(final_url, destination, total_size, resume_state,
+                                                    stop_event, throttle)
+        else:
+            downloaded, sha256 = download_single_stream(url, destination, resume_state, stop_event, throttle)
         
-        with open(destination, 'wb') as f:
-            for data in response.iter_content(block_size):
-                downloaded += len(data)
-                f.write(data)
-                
-                current_time = time.time()
-                elapsed_time = current_time - start_time
-                
-                progress = int((downloaded / total_size) * 100) if total_size > 0 else 0
-                
-                # Calculate speed and ETA
-                speed = downloaded / elapsed_time if elapsed_time > 0 else 0
-                eta = (total_size - downloaded) / speed if speed > 0 and total_size > 0 else 0
-                
-                # Update status every 1% or every 5 seconds, whichever comes first
-                if progress > download_status.get(destination, {}).get('progress', 0) or \
-                   current_time - download_status.get(destination, {}).get('timestamp', 0) > 5:
-                    
-                    update_download_status(destination, {
-                        'progress': progress,
-                        'status': 'downloading',
-                        'downloaded': downloaded,
-                        'speed': speed,
-                        'eta': eta
-                    })
+        if expected_size and downloaded != expected_size:
+            os.remove(get_part_path(destination))
+            raise IOError(f"Downloaded {downloaded} bytes, expected {expected_size}")
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            os.remove(get_part_path(destination))
+            raise IOError(f"SHA-256 mismatch: got {sha256}, expected {expected_sha256}")
+        
+        # Only a complete (and verified) file ever appears at the destination path
+        os.replace(get_part_path(destination), destination)
+        store_cached_hash(destination, sha256)
+        add_to_blob_store(destination, sha256, url)
         
         # Mark as completed
         update_download_status(destination, {
             'progress': 100,
             'status': 'completed',
             'downloaded': downloaded,
+            'ranges': None,
+            'sha256': sha256,
+            'verified': bool(expected_sha256),
             'completion_time': time.time()
         })
         print(f"Download completed: {destination}")
         return True
         
+    except DownloadStopped:
+        # Paused or cancelled; the scheduler records the final status
+        print(f"Download stopped: {destination}")
+        return False
     except Exception as e:
         error_msg = str(e)
         print(f"Download error for {destination}: {error_msg}")
+        # Keep the .part file and recorded offsets so the next attempt can resume
         update_download_status(destination, {
-            'progress': 0,
             'status': 'error',
             'error': error_msg
         })
         return False
 
+def load_hash_cache():
+    """Load cached file digests from persistent storage"""
+    try:
+        if os.path.exists(HASH_CACHE_FILE):
+            with open(HASH_CACHE_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error loading hash cache: {e}")
+    return {}
+
+def save_hash_cache():
+    """Atomically write the hash cache (caller holds hash_cache_lock)"""
+    try:
+        temp_file = HASH_CACHE_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(hash_cache, f)
+        os.replace(temp_file, HASH_CACHE_FILE)
+    except Exception as e:
+        print(f"Error saving hash cache: {e}")
+
+def get_cached_hash(path):
+    """Return the cached SHA-256 for path if its size and mtime are unchanged"""
+    try:
+        stat_info = os.stat(path)
+    except OSError:
+        return None
+    entry = hash_cache.get(path)
+    if entry and entry['size'] == stat_info.st_size and entry['mtime'] == stat_info.st_mtime:
+        return entry['sha256']
+    return None
+
+def store_cached_hash(path, sha256):
+    stat_info = os.stat(path)
+    with hash_cache_lock:
+        hash_cache[path] = {'size': stat_info.st_size, 'mtime': stat_info.st_mtime, 'sha256': sha256}
+        save_hash_cache()
+
+def hash_file(path):
+    """SHA-256 of a file on disk, using the cache when possible; returns (digest, cached)"""
+    cached = get_cached_hash(path)
+    if cached:
+        return cached, True
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        buffer = bytearray(DOWNLOAD_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            sha256.update(view[:count])
+    digest = sha256.hexdigest()
+    store_cached_hash(path, digest)
+    return digest, False
+
+def verify_model(model_info):
+    """Check one configured model on disk against its optional size/sha256"""
+    destination = os.path.join(MODELS_BASE_DIR, model_info['path'])
+    result = {'destination': destination}
+    if not os.path.exists(destination):
+        result['status'] = 'missing'
+        return result
+
+    result['size'] = os.path.getsize(destination)
+    expected_size = model_info.get('size')
+    if expected_size and result['size'] != int(expected_size):
+        result['status'] = 'size_mismatch'
+        result['expected_size'] = int(expected_size)
+        return result
+
+    result['sha256'], result['cached'] = hash_file(destination)
+    expected_sha256 = model_info.get('sha256')
+    if not expected_sha256 or result['sha256'] == expected_sha256.lower():
+        # Files downloaded before the model store existed are adopted here
+        add_to_blob_store(destination, result['sha256'], model_info.get('url'))
+    if not expected_sha256:
+        result['status'] = 'unverified'  # No reference hash configured
+    elif result['sha256'] == expected_sha256.lower():
+        result['status'] = 'ok'
+    else:
+        result['status'] = 'hash_mismatch'
+        result['expected_sha256'] = expected_sha256
+    return result
+
+hash_cache = load_hash_cache()
+hash_cache_lock = threading.Lock()
+
+def get_blob_path(sha256):
+    return os.path.join(BLOB_STORE_DIR, 'blobs', sha256[:2], sha256)
+
+def load_blob_index():
+    """Load the url -> sha256 index of the model store"""
+    try:
+        if os.path.exists(BLOB_INDEX_FILE):
+            with open(BLOB_INDEX_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error loading model store index: {e}")
+    return {}
+
+def save_blob_index():
+    """Atomically write the model store index (caller holds blob_index_lock)"""
+    try:
+        temp_file = BLOB_INDEX_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(blob_index, f, indent=2)
+        os.replace(temp_file, BLOB_INDEX_FILE)
+    except Exception as e:
+        print(f"Error saving model store index: {e}")
+
+def link_file(source, destination):
+    """Atomically place a hardlink to source at destination (symlink across filesystems)"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temp_link = destination + '.link'
+    if os.path.lexists(temp_link):
+        os.remove(temp_link)
+    try:
+        os.link(source, temp_link)
+    except OSError:
+        os.symlink(os.path.realpath(source), temp_link)
+    os.replace(temp_link, destination)
+
+def add_to_blob_store(path, sha256, url=None):
+    """Register a verified model file in the content-addressed store"""
+    blob_path = get_blob_path(sha256)
+    try:
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.link(path, blob_path)
+    except OSError as e:
+        print(f"Could not add {path} to model store: {e}")
+        return
+    if url:
+        with blob_index_lock:
+            if blob_index.get(url) != sha256:
+                blob_index[url] = sha256
+                save_blob_index()
+
+def find_blob(url, expected_sha256=None, expected_size=None):
+    """Return (blob_path, sha256) of a stored copy of this model, or None"""
+    sha256 = expected_sha256.lower() if expected_sha256 else blob_index.get(url)
+    if not sha256:
+        return None
+    blob_path = get_blob_path(sha256)
+    if not os.path.exists(blob_path):
+        return None
+    if expected_size and os.path.getsize(blob_path) != expected_size:
+        return None
+    return blob_path, sha256
+
+def link_from_blob_store(url, destination, expected_sha256=None, expected_size=None):
+    """Link a model into place from the store instead of downloading it; returns True on success"""
+    blob = find_blob(url, expected_sha256, expected_size)
+    if blob is None:
+        return False
+    blob_path, sha256 = blob
+    try:
+        link_file(blob_path, destination)
+    except OSError as e:
+        print(f"Could not link {destination} from model store: {e}")
+        return False
+    store_cached_hash(destination, sha256)
+    file_size = os.path.getsize(destination)
+    update_download_status(destination, {
+        'progress': 100,
+        'status': 'completed',
+        'url': url,
+        'downloaded': file_size,
+        'file_size': file_size,
+        'sha256': sha256,
+        'linked_from': blob_path,
+        'completion_time': time.time()
+    })
+    print(f"Linked {destination} from model store")
+    return True
+
+def prune_blob_store():
+    """Delete hardlinked blobs no model file refers to any more; returns bytes freed"""
+    # Blobs reached through symlinks (cross-filesystem links) don't show up in st_nlink
+    symlinked = set()
+    for dirpath, _, filenames in os.walk(MODELS_BASE_DIR):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.islink(path):
+                symlinked.add(os.path.realpath(path))
+
+    freed = 0
+    blobs_dir = os.path.join(BLOB_STORE_DIR, 'blobs')
+    for dirpath, _, filenames in os.walk(blobs_dir):
+        for filename in filenames:
+            blob_path = os.path.join(dirpath, filename)
+            stat_info = os.stat(blob_path)
+            if stat_info.st_nlink == 1 and os.path.realpath(blob_path) not in symlinked:
+                os.remove(blob_path)
+                freed += stat_info.st_size
+    with blob_index_lock:
+        for url, sha256 in list(blob_index.items()):
+            if not os.path.exists(get_blob_path(sha256)):
+                del blob_index[url]
+        save_blob_index()
+    return freed
+
+blob_index = load_blob_index()
+blob_index_lock = threading.Lock()
+
+def get_model_priority(model_info):
+    """Queue priority for a model: explicit 'priority' field, else based on its path"""
+    if 'priority' in model_info:
+        return int(model_info['priority'])
+    path = model_info.get('path', '')
+    for prefixes, priority in PATH_PRIORITIES:
+        if path.startswith(prefixes):
+            return priority
+    return DEFAULT_PRIORITY
+
+def discard_partial_download(destination):
+    """Delete a download's .part file and forget its resume offsets"""
+    part_path = get_part_path(destination)
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    update_download_status(destination, {'progress': 0, 'downloaded': 0, 'ranges': None})
+
+def link_completed_download(source, destination):
+    """Place an already downloaded file at another destination"""
+    try:
+        if not os.path.exists(destination):
+            link_file(source, destination)
+        sha256 = get_cached_hash(source)
+        if sha256:
+            store_cached_hash(destination, sha256)
+        file_size = os.path.getsize(destination)
+        update_download_status(destination, {
+            'progress': 100,
+            'status': 'completed',
+            'downloaded': file_size,
+            'file_size': file_size,
+            'sha256': sha256,
+            'completion_time': time.time()
+        })
+    except Exception as e:
+        update_download_status(destination, {'status': 'error', 'error': str(e)})
+
+STOP_STATUSES = {'cancel': 'cancelled', 'pause': 'paused', 'interrupt': 'interrupted'}
+
+class DownloadScheduler:
+    """Runs queued downloads on a bounded number of threads, lowest priority value first"""
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max_concurrent
+        self.queue = []  # heap of (priority, sequence, destination)
+        self.jobs = {}  # destination -> job dict for queued and active downloads
+        self.url_owners = {}  # url -> destination that is fetching it
+        self.sequence = 0
+        self.closed = False  # No new downloads start once the process is shutting down
+        self.lock = threading.Lock()
+
+    def submit(self, url, destination, priority=DEFAULT_PRIORITY, expected_sha256=None, expected_size=None,
+               rate_limit=None, background=False):
+        """Queue a download; returns 'queued', 'duplicate' or 'in_progress'"""
+        with self.lock:
+            if destination in self.jobs:
+                return 'in_progress'
+
+            previous_url = download_status.get(destination, {}).get('url')
+            if previous_url and previous_url != url:
+                discard_partial_download(destination)
+            status_update = {'status': 'queued', 'url': url, 'priority': priority, 'error': None,
+                             'expected_sha256': expected_sha256, 'expected_size': expected_size,
+                             'rate_limit': rate_limit, 'background': background}
+
+            owner = self.url_owners.get(url)
+            if owner is not None:
+                # Same file is already being fetched: link it into place when that finishes
+                self.jobs[owner]['followers'].append(destination)
+                status_update['duplicate_of'] = owner
+                update_download_status(destination, status_update)
+                return 'duplicate'
+
+            self.sequence += 1
+            self.jobs[destination] = {
+                'url': url,
+                'priority': priority,
+                'expected_sha256': expected_sha256,
+                'expected_size': expected_size,
+                'state': 'queued',
+                'stop_event': threading.Event(),
+                'stop_action': None,
+                'throttle': DownloadThrottle(rate_limit, background),
+                'followers': []
+            }
+            self.url_owners[url] = destination
+            heapq.heappush(self.queue, (priority, self.sequence, destination))
+            update_download_status(destination, status_update)
+            self._dispatch()
+        return 'queued'
+
+    def stop(self, destination, action):
+        """Pause or cancel a queued or active download; action is 'pause' or 'cancel'"""
+        with self.lock:
+            job = self.jobs.get(destination)
+            if job is None:
+                return self._stop_follower(destination, action)
+            job['stop_action'] = action
+            if job['state'] == 'active':
+                # The worker thread finishes the transition once the transfer stops
+                job['stop_event'].set()
+                return True
+            self._forget(destination, job)
+        self._finish_stop(destination, job)
+        return True
+
+    def _stop_follower(self, destination, action):
+        """Detach a duplicate destination from the job fetching its URL (caller holds self.lock)"""
+        for job in self.jobs.values():
+            if destination in job['followers']:
+                job['followers'].remove(destination)
+                update_download_status(destination, {'status': STOP_STATUSES[action]})
+                return True
+        return False
+
+    def set_limits(self, destination, rate_limit=None, background=None):
+        """Change a queued or active download's rate cap (0 removes it) or background class"""
+        with self.lock:
+            job = self.jobs.get(destination)
+            if job is None:
+                return False
+            status_update = {}
+            if rate_limit is not None:
+                job['throttle'].bucket.set_rate(rate_limit)
+                status_update['rate_limit'] = rate_limit or None
+            if background is not None:
+                job['throttle'].background = background
+                status_update['background'] = background
+        update_download_status(destination, status_update)
+        return True
+
+    def set_max_concurrent(self, max_concurrent):
+        with self.lock:
+            self.max_concurrent = max(1, max_concurrent)
+            self._dispatch()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'active': [d for d, job in self.jobs.items() if job['state'] == 'active'],
+                'queued': [d for _, _, d in sorted(self.queue)
+                           if d in self.jobs and self.jobs[d]['state'] == 'queued']
+            }
+
+    def shutdown(self, timeout):
+        """Interrupt active downloads, keeping their .part files, and stop starting new ones.
+
+        Interrupted and still-queued downloads are requeued by
+        resume_interrupted_downloads() when the service starts again.
+        """
+        with self.lock:
+            self.closed = True
+            threads = []
+            for job in self.jobs.values():
+                if job['state'] == 'active':
+                    job['stop_action'] = 'interrupt'
+                    job['stop_event'].set()
+                    threads.append(job['thread'])
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+
+    def _dispatch(self):
+        """Start queued jobs while below the concurrency limit (caller holds self.lock)"""
+        if self.closed:
+            return
+        active = sum(1 for job in self.jobs.values() if job['state'] == 'active')
+        while self.queue and active < self.max_concurrent:
+            _, _, destination = heapq.heappop(self.queue)
+            job = self.jobs.get(destination)
+            if job is None or job['state'] != 'queued':
+                continue  # Stopped while waiting in the queue
+            job['state'] = 'active'
+            active += 1
+            thread = threading.Thread(target=self._run, args=(destination, job))
+            thread.daemon = True
+            job['thread'] = thread
+            thread.start()
+
+    def _run(self, destination, job):
+        success = download_file(job['url'], destination, job['stop_event'],
+                                job['expected_sha256'], job['expected_size'], job['throttle'])
+        with self.lock:
+            self._forget(destination, job)
+            self._dispatch()
+
+        # A stop that arrives after the last byte is too late: the completed download wins
+        if success:
+            for follower in job['followers']:
+                link_completed_download(destination, follower)
+        elif job['stop_action']:
+            self._finish_stop(destination, job)
+        else:
+            error = download_status.get(destination, {}).get('error')
+            for follower in job['followers']:
+                update_download_status(follower, {'status': 'error', 'error': error})
+
+    def _forget(self, destination, job):
+        """Drop a job from the scheduler (caller holds self.lock)"""
+        self.jobs.pop(destination, None)
+        if self.url_owners.get(job['url']) == destination:
+            del self.url_owners[job['url']]
+
+    def _finish_stop(self, destination, job):
+        final_status = STOP_STATUSES[job['stop_action']]
+        if final_status == 'cancelled':
+            discard_partial_download(destination)
+        update_download_status(destination, {'status': final_status})
+        for follower in job['followers']:
+            update_download_status(follower, {'status': final_status})
+
+download_scheduler = DownloadScheduler(MAX_CONCURRENT_DOWNLOADS)
+
+def shutdown_downloads():
+    """Checkpoint active downloads as interrupted and end event streams (graceful server stop)"""
+    server_stopping.set()
+    with status_changed:
+        status_changed.notify_all()
+    download_scheduler.shutdown(SHUTDOWN_TIMEOUT)
+    save_download_status()
+
+def resume_interrupted_downloads():
+    """Requeue downloads that were queued or in progress when the previous process stopped"""
+    for dest, status in list(download_status.items()):
+        if status.get('status') in ['interrupted', 'queued'] and status.get('url'):
+            print(f"Resuming interrupted download: {dest}")
+            download_scheduler.submit(status['url'], dest, status.get('priority', DEFAULT_PRIORITY),
+                                      status.get('expected_sha256'), status.get('expected_size'),
+                                      status.get('rate_limit'), status.get('background', False))
+
+def queue_model_download(model_info, background=False):
+    """Queue one configured model; returns (response dict, HTTP status code)"""
+    destination = os.path.join(MODELS_BASE_DIR, model_info['path'])
+    expected_size = int(model_info['size']) if model_info.get('size') else None
+    rate_limit = float(model_info['rate_limit_mb']) * 1024 * 1024 if model_info.get('rate_limit_mb') else None
+    return queue_download(model_info['url'], destination, get_model_priority(model_info),
+                          model_info.get('sha256'), expected_size, rate_limit,
+                          background or bool(model_info.get('background')))
+
+def is_complete_file(destination, expected_sha256=None, expected_size=None):
+    """Whether an existing file matches the expected size and (cached) hash"""
+    if expected_size and os.path.getsize(destination) != expected_size:
+        return False
+    cached = get_cached_hash(destination)
+    if expected_sha256 and cached and cached != expected_sha256.lower():
+        return False
+    return True
+
+def queue_download(url, destination, priority, expected_sha256=None, expected_size=None,
+                   rate_limit=None, background=False):
+    """Queue a download unless the file is already there; returns (response dict, HTTP status code)"""
+    # Check if a complete file already exists (truncated/mismatched files are re-downloaded)
+    if os.path.exists(destination) and is_complete_file(destination, expected_sha256, expected_size):
+        file_size = os.path.getsize(destination)
+        update_download_status(destination, {
+            'progress': 100,
+            'status': 'completed',
+            'downloaded': file_size,
+            'file_size': file_size
+        })
+        return {'status': 'already_exists', 'destination': destination}, 200
+    
+    # Another model set may already have fetched the same file
+    if link_from_blob_store(url, destination, expected_sha256, expected_size):
+        return {'status': 'linked', 'destination': destination}, 200
+    
+    # Queue the download (resumes from an existing .part file when possible)
+    result = download_scheduler.submit(url, destination, priority, expected_sha256, expected_size,
+                                       rate_limit, background)
+    if result == 'in_progress':
+        return {'error': 'Download already in progress', 'destination': destination}, 409
+    return {'status': result, 'destination': destination}, 200
+
 @app.route('/')
 def index():
     return render_template('index.html', model_configs=MODEL_CONFIGS)
@@ -461,57 +1423,221 @@ def start_download():
     if not model_info:
         return jsonify({'error': 'Model not found'}), 404
     
-    destination = os.path.join(MODELS_BASE_DIR, model_info['path'])
+    response, code = queue_model_download(model_info)
+    return jsonify(response), code
+
+@app.route('/download_set', methods=['POST'])
+def start_download_set():
+    """Queue every model of a model set, small support files first"""
+    data = request.get_json(silent=True) or request.form
+    model_set = data.get('model_set')
     
-    # Check if file already exists
-    if os.path.exists(destination):
-        file_size = os.path.getsize(destination)
-        update_download_status(destination, {
-            'progress': 100,
-            'status': 'completed',
-            'downloaded': file_size,
-            'file_size': file_size
-        })
-        return jsonify({'status': 'already_exists', 'destination': destination})
+    if not model_set or model_set not in MODEL_CONFIGS:
+        return jsonify({'error': 'Model set not found'}), 404
     
-    # Check if download is already in progress
-    current_status = download_status.get(destination, {})
-    if current_status.get('status') == 'downloading':
-        return jsonify({'error': 'Download already in progress'}), 409
+    background = parse_bool(data.get('background'))
+    models = sorted(MODEL_CONFIGS[model_set]['models'].items(),
+                    key=lambda item: get_model_priority(item[1]))
+    results = {}
+    for model_id, model_info in models:
+        results[model_id], _ = queue_model_download(model_info, background)
     
-    # Start new download
-    thread = threading.Thread(target=download_file, args=(model_info['url'], destination))
-    thread.daemon = True
-    thread.start()
+    return jsonify({'status': 'queued', 'model_set': model_set, 'results': results})
+
+@app.route('/verify', methods=['POST'])
+def verify_models():
+    """Re-hash downloaded models (optionally one set or model) and compare with model_configs.json"""
+    data = request.get_json(silent=True) or request.form
+    model_set = data.get('model_set')
+    model_id = data.get('model_id')
+    
+    if model_set and model_set not in MODEL_CONFIGS:
+        return jsonify({'error': 'Model set not found'}), 404
+    
+    models = {}
+    for set_id, group in MODEL_CONFIGS.items():
+        if model_set and set_id != model_set:
+            continue
+        for mid, model_info in group['models'].items():
+            if not model_id or mid == model_id:
+                models[(set_id, mid)] = model_info
     
-    return jsonify({'status': 'started', 'destination': destination})
+    with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as executor:
+        futures = {key: executor.submit(verify_model, info) for key, info in models.items()}
+    
+    results = {}
+    for (set_id, mid), future in futures.items():
+        results.setdefault(set_id, {})[mid] = future.result()
+    return jsonify(results)
+
+@app.route('/prune_store', methods=['POST'])
+def prune_store():
+    """Remove model store blobs that are no longer linked from the models directory"""
+    freed = prune_blob_store()
+    return jsonify({'status': 'pruned', 'freed_bytes': freed, 'freed_mb': round(freed / (1024 * 1024), 1)})
+
+@app.route('/pause_download', methods=['POST'])
+def pause_download():
+    return stop_download('pause')
+
+@app.route('/cancel_download', methods=['POST'])
+def cancel_download():
+    return stop_download('cancel')
+
+def stop_download(action):
+    """Pause or cancel the download for the destination in the request"""
+    data = request.get_json(silent=True) or request.form
+    destination = data.get('destination')
+    if not destination:
+        return jsonify({'error': 'Missing destination'}), 400
+    if not download_scheduler.stop(destination, action):
+        return jsonify({'error': 'Download is not queued or active'}), 404
+    return jsonify({'status': 'stopping', 'action': action, 'destination': destination})
+
+@app.route('/resume_download', methods=['POST'])
+def resume_download():
+    """Requeue a paused, cancelled or failed download"""
+    data = request.get_json(silent=True) or request.form
+    destination = data.get('destination')
+    status = download_status.get(destination or '', {})
+    if not status.get('url'):
+        return jsonify({'error': 'Unknown download'}), 404
+    response, code = queue_download(status['url'], destination, status.get('priority', DEFAULT_PRIORITY),
+                                    status.get('expected_sha256'), status.get('expected_size'),
+                                    status.get('rate_limit'), status.get('background', False))
+    return jsonify(response), code
+
+@app.route('/scheduler', methods=['GET', 'POST'])
+def scheduler_settings():
+    """Show the download queue, or change the concurrency limit"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        try:
+            download_scheduler.set_max_concurrent(int(data.get('max_concurrent')))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_concurrent must be an integer'}), 400
+    return jsonify(download_scheduler.snapshot())
+
+@app.route('/bandwidth', methods=['GET', 'POST'])
+def bandwidth_settings():
+    """Show or change bandwidth limits (MB/s, 0 = unlimited).
+
+    POST global_limit_mb and/or background_yield_mb to change the shared limits,
+    or destination with limit_mb and/or background to adjust one download.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        try:
+            if data.get('destination'):
+                limit = data.get('limit_mb')
+                background = data.get('background')
+                if not download_scheduler.set_limits(
+                        data['destination'],
+                        float(limit) * 1024 * 1024 if limit is not None else None,
+                        parse_bool(background) if background is not None else None):
+                    return jsonify({'error': 'Download is not queued or active'}), 404
+            if data.get('global_limit_mb') is not None:
+                global_bandwidth.set_rate(float(data['global_limit_mb']) * 1024 * 1024)
+            if data.get('background_yield_mb') is not None:
+                background_bandwidth.set_rate(float(data['background_yield_mb']) * 1024 * 1024)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Limits must be numbers'}), 400
+
+    downloads = {}
+    with download_lock:
+        for dest, status in download_status.items():
+            if status.get('status') in ['queued', 'starting', 'downloading']:
+                downloads[dest] = {
+                    'limit_mb': round((status.get('rate_limit') or 0) / (1024 * 1024), 2),
+                    'background': bool(status.get('background'))
+                }
+    return jsonify({
+        'global_limit_mb': round(global_bandwidth.rate / (1024 * 1024), 2),
+        'background_yield_mb': round(background_bandwidth.rate / (1024 * 1024), 2),
+        'interactive_transfer_active': interactive_transfer_active(),
+        'downloads': downloads
+    })
+
+def parse_bool(value):
+    """Interpret a JSON boolean or form value such as 'true'/'1'/'on'"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
 
 @app.route('/status')
 def get_status():
     # Clean up stale downloads before returning status
     cleanup_stale_downloads()
     
+    with download_lock:
+        snapshot = {dest: status.copy() for dest, status in download_status.items()}
+    
     # Return status with formatted data for display
-    formatted_status = {}
-    for dest, status in download_status.items():
-        formatted_status[dest] = status.copy()
-        
-        # Add human-readable file sizes and speeds
-        if 'file_size' in status and status['file_size'] > 0:
-            formatted_status[dest]['file_size_mb'] = round(status['file_size'] / (1024 * 1024), 1)
-        
-        if 'downloaded' in status and status['downloaded'] > 0:
-            formatted_status[dest]['downloaded_mb'] = round(status['downloaded'] / (1024 * 1024), 1)
-        
-        if 'speed' in status and status['speed'] > 0:
-            speed_mb = status['speed'] / (1024 * 1024)
-            formatted_status[dest]['speed_mb'] = round(speed_mb, 1)
-        
-        if 'eta' in status and status['eta'] > 0:
-            eta_minutes = status['eta'] / 60
-            formatted_status[dest]['eta_minutes'] = round(eta_minutes, 1)
+    return jsonify({dest: format_status_entry(status) for dest, status in snapshot.items()})
+
+@app.route('/status/stream')
+def status_stream():
+    """Server-Sent Events: one full snapshot, then only the entries that changed.
+
+    At most MAX_STATUS_STREAMS are open at once, so streams can't take every server
+    thread from /download and /status; beyond that the client gets a 503 and polls.
+    """
+    if not status_stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many status streams open; poll /status instead'}), 503
+
+    def generate():
+        last_seen = -1
+        yield "retry: 3000\n\n"
+        while not server_stopping.is_set():
+            with status_changed:
+                if last_seen >= 0:
+                    status_changed.wait_for(lambda: status_version > last_seen or server_stopping.is_set(),
+                                            timeout=STREAM_KEEPALIVE)
+                if status_version == last_seen:
+                    event = None
+                elif last_seen < 0:
+                    event = {'full': True, 'removed': [],
+                             'changes': {dest: status.copy() for dest, status in download_status.items()}}
+                else:
+                    event = {'full': False,
+                             'removed': [dest for dest, version in removed_versions.items() if version > last_seen],
+                             'changes': {dest: download_status[dest].copy()
+                                         for dest, version in entry_versions.items()
+                                         if version > last_seen and dest in download_status}}
+                last_seen = status_version
+
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            event['changes'] = {dest: format_status_entry(status) for dest, status in event['changes'].items()}
+            yield f"data: {json.dumps(event)}\n\n"
+            time.sleep(STREAM_MIN_INTERVAL)
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(status_stream_slots.release)
+    return response
+
+def format_status_entry(status):
+    """Add human-readable sizes, speed and ETA to a copy of a status entry"""
+    formatted = status.copy()
+    
+    if status.get('file_size') and status['file_size'] > 0:
+        formatted['file_size_mb'] = round(status['file_size'] / (1024 * 1024), 1)
+    
+    if status.get('downloaded') and status['downloaded'] > 0:
+        formatted['downloaded_mb'] = round(status['downloaded'] / (1024 * 1024), 1)
     
-    return jsonify(formatted_status)
+    if status.get('speed') and status['speed'] > 0:
+        speed_mb = status['speed'] / (1024 * 1024)
+        formatted['speed_mb'] = round(speed_mb, 1)
+    
+    if status.get('eta') and status['eta'] > 0:
+        eta_minutes = status['eta'] / 60
+        formatted['eta_minutes'] = round(eta_minutes, 1)
+    
+    return formatted
 
 @app.route('/clear_completed', methods=['POST'])
 def clear_completed():
@@ -525,8 +1651,9 @@ def clear_completed():
         for dest in to_remove:
             del download_status[dest]
         
-        save_download_status()
+        mark_status_changed(removed=to_remove)
     
+    save_download_status()
     return jsonify({'status': 'cleared', 'removed_count': len(to_remove)})
 
 @app.route('/get_model_configs')
@@ -680,4 +1807,5 @@ MODEL_CONFIGS = load_model_configs()
 initialize_config_file()
 
 if __name__ == '__main__':
+    resume_interrupted_downloads()
     app.run(host='0.0.0.0', port=8866)
@@ -29,6 +29,7 @@ fi
 STATUS_FILES=(
     "/workspace/installation_progress.log"
     "/workspace/installation_status.json"
+    "/workspace/installation_events.jsonl"
     "/workspace/sageattention_install.log"
 )
 
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Run file_manager.py or model_downloader.py on gunicorn instead of the Flask development server.
+
+`python file_manager.py` still starts the development server. This runs the same app
+on gunicorn's threaded (gthread) workers:
+  - each worker serves requests from a bounded thread pool, and idle keep-alive
+    connections wait in a selector instead of holding a thread
+  - on SIGTERM the server stops accepting connections and gives in-flight requests
+    WEB_GRACEFUL_TIMEOUT seconds. The service's shutdown hook runs first, so active
+    downloads are checkpointed as interrupted and event streams end
+  - file responses go out with sendfile()
+
+The app module is imported inside the worker, not the master process, so background
+threads (size/search index watchers, the download scheduler) run where requests are served.
+Both services always run a single worker and scale with threads instead: model_downloader's
+scheduler and download status live in its process, and file_manager's directory size and
+search indexers write shared files (/workspace/.dir_size_index.json, /workspace/.file_search.db)
+that one set of indexer threads must own.
+
+If gunicorn isn't installed (or WEB_SERVER=dev), this falls back to the development server.
+
+The time from launch until the app is loaded (imported, startup hook done) is reported
+as the <service>_load phase of the startup timeline on /installation-status.
+
+Usage: python serve.py file_manager|model_downloader [--port N] [--workers N] [--threads N]
+Environment: FILE_MANAGER_THREADS, MODEL_DOWNLOADER_THREADS,
+             WEB_KEEPALIVE, WEB_GRACEFUL_TIMEOUT, WEB_SERVER
+"""
+import argparse
+import importlib
+import os
+import signal
+import sys
+import threading
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+from installation_events import update_status
+
+SERVICES = {
+    'file_manager': {'port': 8765, 'threads': 16, 'max_workers': 1,
+                     'startup': None, 'shutdown': None},
+    # Up to MAX_STATUS_STREAMS (4) of these threads are held by open /status/stream connections
+    'model_downloader': {'port': 8866, 'threads': 16, 'max_workers': 1,
+                         'startup': 'resume_interrupted_downloads', 'shutdown': 'shutdown_downloads'},
+}
+KEEPALIVE = int(os.environ.get('WEB_KEEPALIVE', 5))  # Seconds an idle connection is kept open
+GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+def load_service(name):
+    """Import the service module and run its startup hook; returns the Flask app"""
+    module = importlib.import_module(name)
+    startup = SERVICES[name]['startup']
+    if startup:
+        getattr(module, startup)()
+    update_status(f'{name}_load', 'completed')
+    return module.app
+
+def install_shutdown_hook(name):
+    """Run the service's shutdown hook as soon as the worker is asked to stop"""
+    shutdown = SERVICES[name]['shutdown']
+    if not shutdown:
+        return
+    handle_term = signal.getsignal(signal.SIGTERM)
+
+    def on_term(signum, frame):
+        # In a thread: the hook waits for downloads, the signal handler must return quickly
+        threading.Thread(target=getattr(sys.modules[name], shutdown), daemon=True).start()
+        if callable(handle_term):
+            handle_term(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+if BaseApplication is not None:
+    class ServiceApplication(BaseApplication):
+        """gunicorn application that imports the service in each worker"""
+
+        def __init__(self, name, options):
+            self.name = name
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_service(self.name)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('service', choices=sorted(SERVICES))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, help='default: the port the service normally uses')
+    parser.add_argument('--workers', type=int, help='worker processes (both services keep their state in one process, so at most 1)')
+    parser.add_argument('--threads', type=int, help='request threads per worker')
+    args = parser.parse_args()
+    update_status(f'{args.service}_load', 'running')
+
+    service = SERVICES[args.service]
+    prefix = args.service.upper()
+    port = args.port or service['port']
+    workers = args.workers or int(os.environ.get(f'{prefix}_WORKERS', 1))
+    if service['max_workers'] and workers > service['max_workers']:
+        print(f"{args.service} keeps its state in one process; using {service['max_workers']} worker")
+        workers = service['max_workers']
+    threads = args.threads or int(os.environ.get(f'{prefix}_THREADS', service['threads']))
+
+    if BaseApplication is None or os.environ.get('WEB_SERVER') == 'dev':
+        print(f"Serving {args.service} with the Flask development server (pip install gunicorn for production)")
+        load_service(args.service).run(host=args.host, port=port, threaded=True)
+        return
+
+    print(f"Serving {args.service} on gunicorn: {workers} worker(s) x {threads} threads, port {port}")
+    ServiceApplication(args.service, {
+        'bind': f'{args.host}:{port}',
+        'workers': workers,
+        'worker_class': 'gthread',
+        'threads': threads,
+        'keepalive': KEEPALIVE,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        # gthread workers heartbeat from their event loop, so long downloads don't trip this
+        'timeout': 120,
+        'post_worker_init': lambda worker: install_shutdown_hook(args.service),
+        'accesslog': None,
+        'errorlog': '-',
+    }).run()
+
+if __name__ == '__main__':
+    # Let `import file_manager` inside the workers find the services next to this script
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -5,6 +5,13 @@ echo "--- start_services.sh: Script started ---"
 # Ensure script exits on error
 set -e
 
+# Progress and startup timing (shown on /installation-status); no-ops if the logger is missing
+if ! source /workspace/comfy_template/installation_logger.sh 2>/dev/null; then
+    emit_event() { :; }
+    update_status() { :; }
+    wait_for_port() { :; }
+fi
+
 echo "Current directory: $(pwd)"
 echo "Listing /workspace:"
 ls -la /workspace
@@ -18,9 +25,12 @@ if [ -d "/workspace/ComfyUI" ] && [ -f "/workspace/ComfyUI/main.py" ]; then
     echo "Will update template and start services without full reinstallation."
     echo "============================="
 fi
+# Starts a new startup timeline; every phase below is timed from here
+emit_event boot resuming "$RESUMING_POD"
 
 # Update template repository to get latest configs
 echo "--- Updating template repository for latest configs ---"
+update_status "repo_update" "running"
 cd /workspace
 TEMPLATE_REPO_URL="https://github.com/bbits10/comfy_template.git"
 
@@ -44,66 +54,78 @@ fi
 # Make sure scripts are executable
 chmod +x /workspace/comfy_template/*.sh
 echo "✓ Made scripts executable"
+update_status "repo_update" "completed"
+emit_event template version "$(git -C /workspace/comfy_template rev-parse --short HEAD 2>/dev/null || echo unknown)"
 cd /workspace
 
 # Start JupyterLab from /workspace directory so ComfyUI folder is visible
 echo "Starting JupyterLab from /workspace directory..."
 cd /workspace
+update_status "jupyterlab" "running"
 jupyter lab --ip=0.0.0.0 --port=8888 --no-browser --allow-root --ServerApp.token='' --ServerApp.password='' --ServerApp.allow_origin='*' --ServerApp.allow_remote_access=True &
 JUPYTER_PID=$!
 echo "JupyterLab PID: $JUPYTER_PID"
 echo "JupyterLab started from directory: $(pwd)"
+wait_for_port "jupyterlab" 8888 &
 
 # Start the file manager and model downloader early (before ComfyUI installation)
 echo "Starting file manager early..."
 if [ -f "/workspace/comfy_template/file_manager.py" ]; then
-    python /workspace/comfy_template/file_manager.py &
+    update_status "file_manager" "running"
+    python /workspace/comfy_template/serve.py file_manager &
     FILE_MANAGER_PID=$!
     echo "File Manager PID: $FILE_MANAGER_PID"
+    wait_for_port "file_manager" 8765 &
 else
     echo "WARNING: /workspace/comfy_template/file_manager.py not found! File manager service will not be available."
 fi
 
 echo "Starting model downloader early..."
 if [ -f "/workspace/comfy_template/model_downloader.py" ]; then
-    python /workspace/comfy_template/model_downloader.py &
+    update_status "model_downloader" "running"
+    python /workspace/comfy_template/serve.py model_downloader &
     MODEL_DOWNLOADER_PID=$!
     echo "Model Downloader PID: $MODEL_DOWNLOADER_PID"
+    wait_for_port "model_downloader" 8866 &
 else
     echo "WARNING: /workspace/comfy_template/model_downloader.py not found!"
 fi
 
+# Keep pip's downloads and builds on the volume, so the next pod doesn't fetch them again
+export PIP_CACHE_DIR=${PIP_CACHE_DIR:-/workspace/.cache/pip}
+
 # Run ComfyUI installation in background
+# SageAttention is installed in the background by default ("true" installs it before ComfyUI starts)
+INSTALL_SAGEATTENTION=${INSTALL_SAGEATTENTION:-"background"}
+case "$INSTALL_SAGEATTENTION" in
+    background) INSTALL_ARGS="--background sageattention" ;;
+    false) INSTALL_ARGS="--exclude sageattention" ;;
+    *) INSTALL_ARGS="" ;;
+esac
 if [ "$RESUMING_POD" = true ]; then
     echo "Resuming pod - checking for any missing installations..."
-    echo "Checking if flux_install.sh exists at /workspace/comfy_template/flux_install.sh"
-    if [ ! -f "/workspace/comfy_template/flux_install.sh" ]; then
-        echo "ERROR: /workspace/comfy_template/flux_install.sh not found!"
+    echo "Checking if install_orchestrator.py exists at /workspace/comfy_template/install_orchestrator.py"
+    if [ ! -f "/workspace/comfy_template/install_orchestrator.py" ]; then
+        echo "ERROR: /workspace/comfy_template/install_orchestrator.py not found!"
         exit 1
     else
-        echo "Making flux_install.sh executable..."
-        chmod +x /workspace/comfy_template/flux_install.sh
         echo "Running quick installation check in background..."
-        # Set environment variable to install SageAttention in background by default
-        export INSTALL_SAGEATTENTION="background"
-        bash /workspace/comfy_template/flux_install.sh &
+        # Steps whose markers are still valid are skipped
+        python /workspace/comfy_template/install_orchestrator.py $INSTALL_ARGS &
         INSTALL_PID=$!
         echo "Installation check PID: $INSTALL_PID"
         echo "Installation check is running in background to verify all components are installed."
     fi
 else
     echo "Running ComfyUI installation in background..."
-    echo "Checking if flux_install.sh exists at /workspace/comfy_template/flux_install.sh"
-    if [ ! -f "/workspace/comfy_template/flux_install.sh" ]; then
-        echo "ERROR: /workspace/comfy_template/flux_install.sh not found!"
+    echo "Checking if install_orchestrator.py exists at /workspace/comfy_template/install_orchestrator.py"
+    if [ ! -f "/workspace/comfy_template/install_orchestrator.py" ]; then
+        echo "ERROR: /workspace/comfy_template/install_orchestrator.py not found!"
         exit 1
     else
-        echo "Making flux_install.sh executable..."
-        chmod +x /workspace/comfy_template/flux_install.sh
-        echo "Running flux_install.sh in background..."
-        # Set environment variable to install SageAttention in background by default
-        export INSTALL_SAGEATTENTION="background"
-        bash /workspace/comfy_template/flux_install.sh &
+        echo "Running install_orchestrator.py in background..."
+        # Independent steps (node clones, pip installs, source checkouts) run in parallel
+        python /workspace/comfy_template/install_orchestrator.py $INSTALL_ARGS &
         INSTALL_PID=$!
         echo "ComfyUI installation PID: $INSTALL_PID"
         echo "ComfyUI installation is running in background. Web services are available immediately."
@@ -145,7 +167,7 @@ if [ -z "$MODEL_DOWNLOADER_PID" ]; then
         echo "ERROR: /workspace/comfy_template/model_downloader.py not found!"
         # exit 1 # Decide if this is fatal
     else
-        python /workspace/comfy_template/model_downloader.py &
+        python /workspace/comfy_template/serve.py model_downloader &
         MODEL_DOWNLOADER_PID=$!
         echo "Model Downloader PID: $MODEL_DOWNLOADER_PID"
     fi
@@ -158,7 +180,7 @@ if [ -z "$FILE_MANAGER_PID" ]; then
     if [ ! -f "/workspace/comfy_template/file_manager.py" ]; then
         echo "WARNING: /workspace/comfy_template/file_manager.py not found! File manager service will not be available."
     else
-        python /workspace/comfy_template/file_manager.py &
+        python /workspace/comfy_template/serve.py file_manager &
         FILE_MANAGER_PID=$!
         echo "File Manager PID: $FILE_MANAGER_PID"
     fi
@@ -185,9 +207,12 @@ cd /workspace/ComfyUI
 echo "Current directory after cd: $(pwd)"
 
 echo "Starting ComfyUI..."
+update_status "comfyui" "running"
 python main.py --listen --port 8188 --preview-method auto &
 COMFYUI_PID=$!
 echo "ComfyUI PID: $COMFYUI_PID"
+# Completes the startup timeline once ComfyUI answers
+wait_for_port "comfyui" 8188 &
 
 # Ensure the process started
 echo "Waiting for ComfyUI to start..."
@@ -37,7 +37,7 @@ echo "JupyterLab started from directory: $(pwd)"
 # Start the file manager early
 echo "Starting file manager early..."
 if [ -f "/workspace/comfy_template/file_manager.py" ]; then
-    python /workspace/comfy_template/file_manager.py &
+    python /workspace/comfy_template/serve.py file_manager &
     FILE_MANAGER_PID=$!
     echo "File Manager PID: $FILE_MANAGER_PID"
 else
@@ -47,7 +47,7 @@ fi
 # Start model downloader early
 echo "Starting model downloader early..."
 if [ -f "/workspace/comfy_template/model_downloader.py" ]; then
-    python /workspace/comfy_template/model_downloader.py &
+    python /workspace/comfy_template/serve.py model_downloader &
     MODEL_DOWNLOADER_PID=$!
     echo "Model Downloader PID: $MODEL_DOWNLOADER_PID"
 else
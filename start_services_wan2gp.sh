@@ -49,7 +49,7 @@ fi
 
 # Start Flask file manager
 echo "🌐 Starting Flask file manager..."
-python file_manager.py &
+python serve.py file_manager &
 
 # Wait for file manager to start
 sleep 3
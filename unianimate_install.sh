@@ -166,7 +166,8 @@ conda activate unianimate
 
 cd /workspace/UniAnimate-DiT/SageAttention
 echo "$(date): Installing SageAttention with conda environment activated..."
-python setup.py install
+# Reuses a wheel built earlier for this torch/CUDA/GPU, otherwise builds and keeps one
+python /workspace/comfy_template/wheelhouse.py install sageattention .
 mark_completed "SageAttention installation completed for UniAnimate-DiT"
 update_status "sageattention" "completed"
 echo "$(date): SageAttention installation completed for UniAnimate-DiT!" >> /workspace/sageattention_unianimate_install.log
@@ -184,7 +185,7 @@ EOF
     echo "Installing SageAttention synchronously (this may take 15-20 minutes)..."
     log_step "Installing SageAttention synchronously for UniAnimate-DiT (15-20 minutes)"
     update_status "sageattention" "installing_sync"
-    python setup.py install
+    python /workspace/comfy_template/wheelhouse.py install sageattention .
     mark_completed "SageAttention installation completed synchronously"
     update_status "sageattention" "completed"
   fi
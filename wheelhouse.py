@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Cache of locally built wheels (SageAttention and other compiled packages) on the persistent volume.
+
+Compiling SageAttention takes many minutes of CPU on every fresh pod. Built wheels are kept in
+/workspace/.wheelhouse/<key>/, where the key is the ABI the wheel was compiled against:
+Python version, torch version, CUDA version and GPU architecture, e.g.
+cp311-torch2.8.0-cu128-sm89. A wheel is reused while the key and the source revision match,
+so a pod with the same image and GPU type installs it in seconds, and a different torch or
+GPU builds (once) into its own directory. Builds take a lock, so pods sharing the volume
+don't compile the same wheel twice at once.
+
+Each lookup is reported to the installation event log as a hit or a miss (with the build time
+saved or spent), which /api/installation-status summarizes under "wheelhouse".
+
+Usage: python wheelhouse.py install NAME SOURCE_DIR   build (or reuse) and pip install the wheel
+       python wheelhouse.py key                       print the ABI key of this Python
+       python wheelhouse.py list                      show the cached wheels
+"""
+import argparse
+import contextlib
+import fcntl
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from installation_events import emit_event
+
+WHEELHOUSE_DIR = os.environ.get('WHEELHOUSE_DIR', "/workspace/.wheelhouse")
+# pip's own download/build cache, also on the volume so large wheels (torch and friends) survive pods
+PIP_CACHE_DIR = "/workspace/.cache/pip"
+
+# Runs in the target interpreter, which may not be this one (e.g. a conda environment)
+ABI_SCRIPT = r'''
+import json, os, sys
+info = {'python': 'cp%d%d' % sys.version_info[:2], 'torch': None, 'cuda': None, 'arch': None}
+try:
+    import torch
+    info['torch'] = torch.__version__.split('+')[0]
+    info['cuda'] = torch.version.cuda
+    if torch.cuda.is_available():
+        info['arch'] = 'sm%d%d' % torch.cuda.get_device_capability()
+except Exception:
+    pass
+info['arch'] = os.environ.get('TORCH_CUDA_ARCH_LIST') or info['arch']
+print(json.dumps(info))
+'''
+
+@functools.lru_cache(maxsize=None)
+def abi_key(python=sys.executable):
+    """Wheelhouse key for the interpreter at python, e.g. cp311-torch2.8.0-cu128-sm89"""
+    output = subprocess.run([python, '-c', ABI_SCRIPT], capture_output=True, text=True, check=True).stdout
+    info = json.loads(output.strip().splitlines()[-1])
+    cuda = (info['cuda'] or 'none').replace('.', '')
+    arch = ''.join(c if c.isalnum() or c in '.+' else '_' for c in (info['arch'] or 'noarch'))
+    return f"{info['python']}-torch{info['torch'] or 'none'}-cu{cuda}-{arch}"
+
+def source_revision(source):
+    """Git commit of the source tree (with its uncommitted changes), else a hash of its setup files"""
+    try:
+        revision = subprocess.run(['git', '-C', source, 'rev-parse', 'HEAD'],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        diff = subprocess.run(['git', '-C', source, 'diff', 'HEAD'], capture_output=True, check=True).stdout
+        return revision + ('-' + hashlib.sha256(diff).hexdigest()[:8] if diff else '')
+    except (OSError, subprocess.CalledProcessError):
+        digest = hashlib.sha256()
+        for name in ('setup.py', 'pyproject.toml', 'setup.cfg'):
+            path = os.path.join(source, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return 'files-' + digest.hexdigest()[:16]
+
+def read_index(key_dir):
+    try:
+        with open(os.path.join(key_dir, 'index.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_index(key_dir, index):
+    temp_path = os.path.join(key_dir, 'index.json.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_path, os.path.join(key_dir, 'index.json'))
+
+def default_run(command, cwd=None, env=None):
+    subprocess.run(command, cwd=cwd, env={**os.environ, **(env or {})}, check=True)
+
+def ensure_wheel(name, source, python=sys.executable, env=None, run=default_run):
+    """Path of a wheel of source for python's ABI, building it if the wheelhouse has none.
+
+    Returns (path, hit). run(command, env=...) runs the build, so callers can send its output
+    to their own log; it must raise on failure.
+    """
+    key = abi_key(python)
+    key_dir = os.path.join(WHEELHOUSE_DIR, key)
+    os.makedirs(key_dir, exist_ok=True)
+    revision = source_revision(source)
+    with open(os.path.join(key_dir, f".{name}.lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # Wait for another pod building the same wheel
+        entry = read_index(key_dir).get(name)
+        if entry and entry.get('revision') == revision and os.path.exists(os.path.join(key_dir, entry['wheel'])):
+            emit_event('wheel', name=name, key=key, result='hit', build_seconds=entry.get('build_seconds'))
+            return os.path.join(key_dir, entry['wheel']), True
+
+        start = time.monotonic()
+        build_dir = tempfile.mkdtemp(prefix=f".build-{name}-", dir=key_dir)
+        try:
+            run([python, '-m', 'pip', 'wheel', '--no-deps', '--no-build-isolation', '-w', build_dir, source],
+                env=env)
+            wheels = glob.glob(os.path.join(build_dir, '*.whl'))
+            if not wheels:
+                raise RuntimeError(f"pip wheel built nothing for {name} in {build_dir}")
+            wheel = os.path.basename(wheels[0])
+            os.replace(wheels[0], os.path.join(key_dir, wheel))
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        build_seconds = round(time.monotonic() - start, 1)
+
+        index = read_index(key_dir)
+        previous = index.get(name)
+        if previous and previous['wheel'] != wheel:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(key_dir, previous['wheel']))
+        index[name] = {'revision': revision, 'wheel': wheel, 'built': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'build_seconds': build_seconds}
+        write_index(key_dir, index)
+        emit_event('wheel', name=name, key=key, result='miss', build_seconds=build_seconds)
+        return os.path.join(key_dir, wheel), False
+
+def list_wheels():
+    """(key, name, entry) for every cached wheel"""
+    for key_dir in sorted(glob.glob(os.path.join(WHEELHOUSE_DIR, '*'))):
+        for name, entry in sorted(read_index(key_dir).items()):
+            yield os.path.basename(key_dir), name, entry
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    install = commands.add_parser('install', help='build (or reuse) a wheel of SOURCE_DIR and pip install it')
+    install.add_argument('name', help='cache entry name, e.g. sageattention')
+    install.add_argument('source', help='source tree to build')
+    commands.add_parser('key', help='print the ABI key of this Python')
+    commands.add_parser('list', help='show the cached wheels')
+    args = parser.parse_args()
+
+    if args.command == 'key':
+        print(abi_key())
+    elif args.command == 'list':
+        for key, name, entry in list_wheels():
+            print(f"{key:<40} {name:<20} {entry['wheel']} (built {entry['built']} in {entry['build_seconds']}s)")
+    else:
+        wheel, hit = ensure_wheel(args.name, os.path.abspath(args.source))
+        print(f"{'Reusing' if hit else 'Built'} {wheel}", flush=True)
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '--no-deps', '--force-reinstall', wheel], check=True)
+
+if __name__ == '__main__':
+    main()